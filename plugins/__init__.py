@@ -1,18 +1,58 @@
 import importlib
 import os
+import sys
+from collections.abc import Iterator, Mapping
 from types import ModuleType
-from pydantic import BaseModel
+from typing import Any
 
 module_dir = os.path.dirname(__file__)
 
-for filename in os.listdir(module_dir):
-    if filename.endswith(".py") and filename != "__init__.py":
-        # Remove the .py extension
-        module_name = filename[:-3]
-        importlib.import_module(f".{module_name}", package=__name__)
+
+class PluginRegistry(Mapping[str, ModuleType]):
+    """
+    Maps plugin names to modules. Only filenames are indexed up front; each
+    module is imported the first time it is looked up.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.names = sorted(
+            # Remove the .py extension
+            filename[:-3]
+            for filename in os.listdir(directory)
+            if filename.endswith(".py") and filename != "__init__.py"
+        )
+
+    def __getitem__(self, name: str) -> ModuleType:
+        if name not in self.names:
+            raise KeyError(name)
+        return importlib.import_module(f".{name}", package=__name__)
+
+    def __contains__(self, name: object) -> bool:
+        # Mapping.__contains__ would import the module through __getitem__.
+        return name in self.names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def is_loaded(self, name: str) -> bool:
+        return f"{__name__}.{name}" in sys.modules
+
+
+class _PluginsMeta(type):
+    # Declared here too, so that the lookup below does not go through __getattr__.
+    all_plugins: PluginRegistry
+
+    def __getattr__(cls, name: str) -> ModuleType:
+        try:
+            return cls.all_plugins[name]
+        except KeyError:
+            raise AttributeError(f"No plugin named {name!r}") from None
 
 
-class Plugins:
+class Plugins(metaclass=_PluginsMeta):
     """
     Plugins class for import at runtime.
 
@@ -25,22 +65,24 @@ class Plugins:
         print(plugin)
     """
 
-    all_plugins: dict[str, BaseModel | ModuleType] = {}
+    all_plugins: PluginRegistry = PluginRegistry(module_dir)
 
     @classmethod
-    def stats(cls) -> None:
-        print("The following plugins have been loaded:")
-        for plugin_name, plugin in cls.all_plugins.items():
+    def stats(cls, load: bool = False) -> None:
+        """List every available plugin. Pass load=True to import them all and count their models."""
+        print("The following plugins are available:")
+        for plugin_name in cls.all_plugins:
+            if not (load or cls.all_plugins.is_loaded(plugin_name)):
+                print(f"- {plugin_name} (not loaded)")
+                continue
+            plugin = cls.all_plugins[plugin_name]
             models_in_plugin = [_ for _ in dir(plugin) if not _.startswith("_")]
             model_count = len(models_in_plugin)
             print(f"- {plugin_name} ({model_count})")
 
 
-for filename in os.listdir(module_dir):
-    if filename.endswith(".py") and filename != "__init__.py":
-        # Remove the .py extension
-        module_name = filename[:-3]
-        # Set each plugin as an attribute of the Plugins class
-        imported_plugin = importlib.import_module(f".{module_name}", package=__name__)
-        setattr(Plugins, module_name, imported_plugin)
-        Plugins.all_plugins[module_name] = imported_plugin
+def __getattr__(name: str) -> Any:
+    """Import plugins on first attribute access, e.g. `plugins.epic_createmeta`."""
+    if name in Plugins.all_plugins:
+        return Plugins.all_plugins[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,83 @@
+"""Compare cache compression formats: size on disk, decode cost and the read I/O they save.
+
+    PYTHONPATH=src python scripts/benchmark_cache_compression.py [--entries 2000] [--disk-mbps 100]
+
+Entries are built from the issues in tests/data/jira_cache (with distinct keys
+and summaries), or from --source, e.g. a real .jira_cache/issues directory.
+A format pays for itself when decoding an entry takes less time than reading
+the bytes it saves at the given disk or network throughput.
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mantis.compression import Compressor, zstandard
+
+
+def load_samples(source: Path, entries: int) -> list[str]:
+    issues = [json.loads(file.read_text()) for file in sorted(source.rglob("*.json"))]
+    if not issues:
+        sys.exit(f"No JSON files in {source}")
+    samples = []
+    for i in range(entries):
+        issue = json.loads(json.dumps(issues[i % len(issues)]))
+        issue["key"] = f"BENCH-{i}"
+        issue.get("fields", {})["summary"] = f"Benchmark issue number {i}"
+        samples.append(json.dumps(issue))
+    return samples
+
+
+def measure(name: str, compressor: Compressor, samples: list[str], directory: Path, disk_mbps: float) -> None:
+    directory.mkdir()
+    for i, contents in enumerate(samples):
+        (directory / f"{i}.json").write_bytes(compressor.compress(contents))
+    files = sorted(directory.iterdir())
+    size = sum(file.stat().st_size for file in files)
+
+    start = time.perf_counter()
+    for file in files:
+        json.loads(compressor.decompress(file.read_bytes()))
+    read = (time.perf_counter() - start) / len(files)
+
+    raw = [file.read_bytes() for file in files]
+    start = time.perf_counter()
+    for data in raw:
+        compressor.decompress(data)
+    decode = (time.perf_counter() - start) / len(files)
+
+    plain = sum(len(contents.encode()) for contents in samples)
+    saved = (plain - size) / len(files) / (disk_mbps * 1e6)
+    print(
+        f"{name:<12} {size / 1e6:>9.2f} {plain / size:>6.1f}x {read * 1e6:>10.1f} {decode * 1e6:>10.1f}"
+        f" {saved * 1e6:>10.1f}  {'-' if name == 'none' else 'yes' if decode <= saved else 'no'}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", type=Path, default=Path("tests/data/jira_cache/issues"))
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--disk-mbps", type=float, default=100.0, help="Throughput the saved bytes are priced at")
+    args = parser.parse_args()
+
+    samples = load_samples(args.source, args.entries)
+    print(f"{len(samples)} entries, I/O priced at {args.disk_mbps:g} MB/s (all times per entry)")
+    print(f"{'format':<12} {'size (MB)':>9} {'ratio':>7} {'read (us)':>10} {'decode(us)':>10} {'saved (us)':>10}  pays off")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        measure("none", Compressor("none", None, root / "dictionaries"), samples, root / "none", args.disk_mbps)
+        measure("gzip", Compressor("gzip", None, root / "dictionaries"), samples, root / "gzip", args.disk_mbps)
+        if zstandard is None:
+            print("zstd         skipped, pip install zstandard")
+            return
+        measure("zstd", Compressor("zstd", None, root / "dictionaries"), samples, root / "zstd", args.disk_mbps)
+        trained = Compressor("zstd", None, root / "dictionaries")
+        trained.train_dictionary([contents.encode() for contents in samples[:500]])
+        measure("zstd+dict", trained, samples, root / "zstd_dict", args.disk_mbps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compare the installed JSON codecs on the recorded Jira payloads in tests/data/jira_cache.
+
+    PYTHONPATH=src python scripts/benchmark_json_codec.py [--rounds 200] [--source tests/data/jira_cache]
+
+Each round decodes and re-encodes every fixture, as Cache and Http do in a bulk
+sync. Install orjson (pip install orjson) to have it compared against the stdlib.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from mantis.json_codec import CODECS, JsonCodec, codec
+
+
+def measure(candidate: JsonCodec, documents: list[bytes], rounds: int) -> tuple[float, float]:
+    parsed = [candidate.loads(document) for document in documents]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for document in documents:
+            candidate.loads(document)
+    loads = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for data in parsed:
+            candidate.dumps(data)
+    dumps = time.perf_counter() - start
+    return loads, dumps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", type=Path, default=Path("tests/data/jira_cache"))
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    documents = [file.read_bytes() for file in sorted(args.source.rglob("*.json"))]
+    size = sum(len(document) for document in documents) * args.rounds
+    print(f"{len(documents)} documents, {size / 1e6:.1f} MB per direction over {args.rounds} rounds")
+    print(f"{'codec':<8} {'loads (s)':>10} {'MB/s':>8} {'dumps (s)':>10} {'MB/s':>8}")
+    baseline = None
+    for name, candidate in CODECS.items():
+        loads, dumps = measure(candidate, documents, args.rounds)
+        line = f"{name:<8} {loads:>10.3f} {size / loads / 1e6:>8.1f} {dumps:>10.3f} {size / dumps / 1e6:>8.1f}"
+        if baseline is None:
+            baseline = (loads, dumps)
+        else:
+            line += f"  ({baseline[0] / loads:.1f}x loads, {baseline[1] / dumps:.1f}x dumps)"
+        print(line)
+    if len(CODECS) == 1:
+        print("orjson   skipped, pip install orjson")
+    print(f"Cache and Http use: {codec.name}")
+
+
+if __name__ == "__main__":
+    main()
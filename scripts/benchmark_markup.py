@@ -0,0 +1,62 @@
+"""Time the local conversion between Jira markup and markdown, as drafts use it.
+
+    PYTHONPATH=src python scripts/benchmark_markup.py [--descriptions 1000] [--source tests/data/jira_cache/issues]
+
+Descriptions are taken from the issues under --source, each followed by a block
+of markup covering every supported construct, and converted to markdown and back.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from drafts.markup import jira_to_markdown, markdown_to_jira
+
+SAMPLE = """
+h2. Acceptance criteria
+* Users can pay with *credit cards* and _gift cards_
+** Declined payments show {{PAYMENT_DECLINED}}
+*# Retried payments are -charged twice- charged once
+See [the design|https://example.com/design_doc] and !mockup.png|thumbnail!
+
+||Case||Expected||
+|Valid card|Order confirmed|
+|Expired card|Error shown|
+{code:python}
+def charge(card, amount):
+    return gateway.charge(card, amount * 100)
+{code}
+bq. Payments must be idempotent.
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", type=Path, default=Path("tests/data/jira_cache/issues"))
+    parser.add_argument("--descriptions", type=int, default=1000)
+    args = parser.parse_args()
+
+    found = [
+        description for file in sorted(args.source.rglob("*.json"))
+        if isinstance(description := json.loads(file.read_text()).get("fields", {}).get("description"), str)
+    ]
+    if not found:
+        sys.exit(f"No issues with a description in {args.source}")
+    descriptions = [found[i % len(found)] + SAMPLE for i in range(args.descriptions)]
+    size = sum(len(description) for description in descriptions)
+    print(f"{len(descriptions)} descriptions, {size / 1e3:.0f} kB")
+
+    start = time.perf_counter()
+    converted = [jira_to_markdown(description) for description in descriptions]
+    to_markdown = time.perf_counter() - start
+    start = time.perf_counter()
+    for description in converted:
+        markdown_to_jira(description)
+    to_jira = time.perf_counter() - start
+    for name, elapsed in (("jira -> markdown", to_markdown), ("markdown -> jira", to_jira)):
+        print(f"{name}: {elapsed:.3f}s ({elapsed / len(descriptions) * 1e6:.0f} us per description)")
+
+
+if __name__ == "__main__":
+    main()
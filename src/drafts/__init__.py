@@ -1,4 +1,5 @@
 from .draft import Draft
+from .markup import jira_to_markdown, markdown_to_jira
 from .template_md import template
 
-__all__ = ["Draft", "template"]
+__all__ = ["Draft", "jira_to_markdown", "markdown_to_jira", "template"]
@@ -1,21 +1,32 @@
+import os
 from pathlib import Path
 import re
-from typing import Any, TYPE_CHECKING, Generator
+from typing import Any, TYPE_CHECKING, Generator, NamedTuple
 import frontmatter  # type: ignore
 
 from enums import TextFormat
+from .markup import jira_to_markdown, markdown_to_jira
 from .template_md import template
 
-# To-do: Create converter for Jira syntax to markdown.
-def j2m(x: str) -> str:
-        return x
-
 if TYPE_CHECKING:
     from jira import JiraIssue
     from mantis.mantis_client import MantisClient
 
+class ParsedDraft(NamedTuple):
+    """A draft file as parsed at one (mtime, size) of the file."""
+    stamp: tuple[int, int]
+    raw: str
+    post: frontmatter.Post
+    # The post with the extra header removed from its content.
+    draft: frontmatter.Post
+
+
 class Draft:
-    """Represents a draft file for a Jira issue."""
+    """Represents a draft file for a Jira issue.
+
+    The file is parsed once and the result is kept until the file changes on
+    disk, so reading many fields of a draft costs one stat each.
+    """
     # Local custom fields that are not in Jira.
     LOCAL_VARS = {'header'}
     REQUIRED_FRONTMATTER = ['header', 'project', 'parent', 'summary', 'status', 'issuetype', 'assignee', 'reporter']
@@ -25,6 +36,11 @@ class Draft:
         self.issue = issue
         self.template = self._load_template()
         self.summary = self.issue.get_field("summary", "")
+        self._parsed: ParsedDraft | None = None
+        # Whether the draft file was written by this instance, rather than already existing.
+        self.created = False
+        # Whether a description was converted by the assistant rather than natively.
+        self.converted = False
         assert self.mantis.drafts_dir
         assert self._required_frontmatter == self.REQUIRED_FRONTMATTER, (
             f'Unexpected required frontmatter: {self._required_frontmatter}'
@@ -80,18 +96,27 @@ class Draft:
 
     def _generate_body(self) -> None:
         """Fill in the template body with summary and description."""
-        description = self.issue.get_field("description") or "Placeholder description"
-        if self.mantis.options.chat_gpt_activated:
-            description = self.mantis.assistant.convert_text_format(
-                input_text=description,
-                target_format=TextFormat.MARKDOWN
-            )
+        description = self.issue.get_field("description")
+        description = self.convert(description, TextFormat.MARKDOWN) if description else "Placeholder description"
         self.template.content = (
             self.template.content
                 .replace('{summary}', self.summary)
                 .replace('{description}', description)
         )
 
+    def convert(self, text: str, target_format: TextFormat) -> str:
+        """Convert a description between Jira markup and markdown.
+
+        The conversion is local, unless the assistant is opted in with
+        convert-with-assistant under [openai].
+        """
+        if self.mantis.options.chat_gpt_activated and self.mantis.options.assistant_conversion:
+            self.converted = True
+            return self.mantis.assistant.convert_text_format(input_text=text, target_format=target_format)
+        if target_format is TextFormat.MARKDOWN:
+            return jira_to_markdown(text)
+        return markdown_to_jira(text)
+
     def _materialize(self) -> None:
         """Write the draft file if it does not already exist."""
         if not self.draft_path.exists():
@@ -99,6 +124,7 @@ class Draft:
             self._generate_body()
             with open(self.draft_path, "wb") as f:
                 frontmatter.dump(self.template, f)
+            self.created = True
 
     def _validate_draft(self) -> None:
         """Ensure the draft file has the expected structure."""
@@ -108,17 +134,30 @@ class Draft:
         if f'# {self.summary}' not in raw:
             raise ValueError(f'Draft file at {self.draft_path} does not contain the expected header: "# {self.summary}"')
 
-    def _remove_draft_header(self) -> str:
+    def _remove_draft_header(self, content: str | None = None) -> str:
         """Remove the extra header from the draft file content and return the result as a string."""
         extra_header = f'# {self.summary}'
-        content = self.load_frontmatter().content
+        if content is None:
+            content = self.parsed.post.content
         new_content = re.sub(rf"^{re.escape(extra_header)}\n*", '', content)
         return new_content
 
+    @property
+    def parsed(self) -> ParsedDraft:
+        """The parsed draft file, reparsed only when its mtime or size changed."""
+        stat = os.stat(self.draft_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if self._parsed is None or self._parsed.stamp != stamp:
+            with open(self.draft_path, "r") as f:
+                raw = f.read()
+            post = frontmatter.loads(raw)
+            draft = frontmatter.Post(self._remove_draft_header(post.content), **post.metadata)
+            self._parsed = ParsedDraft(stamp, raw, post, draft)
+        return self._parsed
+
     @property
     def raw_draft(self) -> str:
-        with open(self.draft_path, "r") as f:
-            data = f.read()
+        data = self.parsed.raw
         if not data:
             raise ValueError('Draft file does not contain any content')
         return data
@@ -140,48 +179,47 @@ class Draft:
         return header
 
     def load_frontmatter(self) -> frontmatter.Post:
-        """Load the frontmatter from the draft file."""
-        with open(self.draft_path, "r") as f:
-            return frontmatter.load(f)
-            
+        """Load the frontmatter from the draft file. The returned post is a copy, free to modify."""
+        post = self.parsed.post
+        return frontmatter.Post(post.content, **post.metadata)
+
     def read_draft(self) -> frontmatter.Post:
-        draft_data = self.load_frontmatter()
-        draft_data.content = self._remove_draft_header()
-        return draft_data
+        """The draft without its extra header. The returned post is a copy, free to modify."""
+        draft = self.parsed.draft
+        return frontmatter.Post(draft.content, **draft.metadata)
 
     def iter_draft_field_items(self) -> Generator[tuple[str, Any], None, None]:
-        draft_data = self.read_draft()
+        draft_data = self.parsed.draft
         for draft_field_key in draft_data.keys():
             if draft_field_key in self.LOCAL_VARS:
                 continue
             yield draft_field_key, draft_data.get(draft_field_key)
 
     def iter_draft_field_keys(self) -> Generator[str, None, None]:
-        draft_data = self.read_draft()
+        draft_data = self.parsed.draft
         for draft_field_key in draft_data.keys():
             if draft_field_key in self.LOCAL_VARS:
                 continue
             yield draft_field_key
 
     def get(self, key: str, default: Any = None) -> Any:
-        draft_data = self.read_draft()
-        return draft_data.get(key, default)
+        return self.parsed.draft.get(key, default)
 
     @property
     def content(self) -> str:
         """Return the content of the draft."""
-        return self.read_draft().content
+        return self.parsed.draft.content
 
     @content.setter
     def content(self, new_content: str) -> None:
         self._validate_draft()
         if not self.draft_path.exists():
             raise FileNotFoundError(f'Draft file at {self.draft_path} does not exist.')
-        with open(self.draft_path, "r") as f:
-            data = frontmatter.load(f)
+        data = self.load_frontmatter()
         data.content = self.header_from_raw + '\n\n' + new_content
         with open(self.draft_path, "wb") as f:
             frontmatter.dump(data, f)
+        self._parsed = None
 
     def make_verbose(self) -> dict[str, str]:
         """Expand the content of the draft using the assistant."""
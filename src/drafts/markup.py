@@ -0,0 +1,360 @@
+"""Conversion between Jira wiki markup and Markdown.
+
+Covers headings, emphasis, lists, code and quote blocks, tables, links and
+images. Both directions convert line by line, so iter_jira_to_markdown and
+iter_markdown_to_jira can consume a stream of lines; jira_to_markdown and
+markdown_to_jira wrap them for whole texts. Markup without an equivalent in
+the other format is kept as it is.
+
+https://jira.atlassian.com/secure/WikiRendererHelpAction.jspa?section=all
+"""
+import re
+from collections.abc import Iterable, Iterator
+
+# Spans that emphasis must not touch (code, links, URLs, escapes) are swapped
+# for placeholders while a line is converted.
+_PLACEHOLDER = re.compile('\x00(\\d+)\x00')
+# Marks bold text during Markdown to Jira, so that it is not read as italics.
+_BOLD = '\x01'
+
+_ESCAPE = re.compile(r'\\[\\`*_{}\[\]()#+\-.!|~^?]')
+_URL = re.compile(r'(?:https?|ftp|mailto):[^\s<>()\[\]|!]+')
+_TABLE_ROW = re.compile(r'^\s*\|.*\|\s*$')
+# Plain text, which most lines are, is returned as it is without running every pattern.
+_MARKUP = re.compile(r'[\\`*_{}\[\]!+^~<-]|:')
+
+
+class _Spans:
+    def __init__(self) -> None:
+        self.spans: list[str] = []
+
+    def hold(self, text: str) -> str:
+        self.spans.append(text)
+        return f'\x00{len(self.spans) - 1}\x00'
+
+    def restore(self, text: str) -> str:
+        return _PLACEHOLDER.sub(lambda m: self.restore(self.spans[int(m.group(1))]), text)
+
+
+def _emphasis(mark: str) -> re.Pattern[str]:
+    """Text between two single marks, not inside a word and not next to a space or another mark."""
+    m = re.escape(mark)
+    return re.compile(rf'(?<![\w\\{m}]){m}(?=[^\s{m}])(.+?)(?<=[^\s\\{m}]){m}(?![\w{m}])')
+
+
+# Jira to Markdown
+
+_J_BLOCK_TAG = re.compile(r'\{(code|noformat)(?::[^}]*)?\}|\{quote\}')
+_J_CODE = re.compile(r'\{(?:code|noformat)(?::([^}]*))?\}')
+_J_HEADING = re.compile(r'^\s*h([1-6])\.\s+(.*)$')
+_J_QUOTE = re.compile(r'^\s*bq\.\s+(.*)$')
+_J_LIST = re.compile(r'^\s*([*#]+|-)\s+(.*)$')
+_J_RULE = re.compile(r'^\s*-{4,}\s*$')
+_J_MONO = re.compile(r'\{\{(.+?)\}\}')
+_J_LINK = re.compile(r'\[(?:([^\[\]|]*)\|)?([^\[\]|]+)\]')
+_J_IMAGE = re.compile(r'!([^\s!|]+\.[A-Za-z0-9]+|https?://[^\s!|]+)(?:\|[^!\n]*)?!')
+_J_TABLE_CELL = re.compile(r'\|\|?')
+_PIPE = re.compile(r'(?<!\\)\|')
+_J_EMPHASIS = [
+    # Marks that Markdown uses are converted last, so that no output is read as input.
+    (_emphasis('~'), r'<sub>\1</sub>'),
+    (_emphasis('^'), r'<sup>\1</sup>'),
+    (_emphasis('+'), r'<ins>\1</ins>'),
+    (_emphasis('-'), r'~~\1~~'),
+    (_emphasis('*'), r'**\1**'),
+    (_emphasis('_'), r'*\1*'),
+]
+
+
+def _jira_link(match: re.Match[str], spans: _Spans) -> str:
+    text, target = match.group(1), match.group(2).strip()
+    if text is None:
+        if _URL.fullmatch(target):
+            return spans.hold(f'<{target}>')
+        if target.startswith('#'):
+            return spans.hold(f'[{target[1:]}]({target})')
+        # Mentions ([~user]) and attachments ([^file]) have no Markdown equivalent.
+        return spans.hold(match.group(0))
+    return f'[{text}]' + spans.hold(f'({target})')
+
+
+def _jira_protect(text: str, spans: _Spans) -> str:
+    text = _ESCAPE.sub(lambda m: spans.hold(m.group(0)), text)
+    text = _J_MONO.sub(lambda m: spans.hold(f'`{m.group(1)}`'), text)
+    text = _J_LINK.sub(lambda m: _jira_link(m, spans), text)
+    text = _J_IMAGE.sub(lambda m: spans.hold(f'![]({m.group(1)})'), text)
+    return _URL.sub(lambda m: spans.hold(m.group(0)), text)
+
+
+def _jira_emphasis(text: str) -> str:
+    for pattern, replacement in _J_EMPHASIS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _jira_inline(text: str) -> str:
+    if not _MARKUP.search(text):
+        return text
+    spans = _Spans()
+    return spans.restore(_jira_emphasis(_jira_protect(text, spans)))
+
+
+def _jira_table_row(line: str) -> tuple[list[str], bool]:
+    spans = _Spans()
+    line = line.strip()
+    cells = _J_TABLE_CELL.split(_jira_protect(line, spans))[1:-1]
+    converted = [_PIPE.sub(r'\\|', spans.restore(_jira_emphasis(cell.strip()))) for cell in cells]
+    return converted, line.startswith('||')
+
+
+def _jira_block_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the lines with {code}, {noformat} and {quote} tags on lines of their own."""
+    closing = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not (closing in line if closing else _J_BLOCK_TAG.search(line)):
+            yield line
+            continue
+        while line:
+            if closing:
+                before, tag, line = line.partition(closing)
+                if before:
+                    yield before
+                if tag:
+                    yield tag
+                    closing = None
+                continue
+            match = _J_BLOCK_TAG.search(line)
+            if not match:
+                if line.strip():
+                    yield line
+                break
+            if line[:match.start()].strip():
+                yield line[:match.start()]
+            yield match.group(0)
+            if match.group(1):
+                closing = '{' + match.group(1) + '}'
+            line = line[match.end():]
+
+
+def _code_language(params: str | None) -> str:
+    for param in (params or '').split('|'):
+        key, _, value = param.partition('=')
+        if not value:
+            return key.strip()
+        if key.strip() == 'language':
+            return value.strip()
+    return ''
+
+
+def iter_jira_to_markdown(lines: Iterable[str]) -> Iterator[str]:
+    """Convert lines of Jira wiki markup to lines of Markdown."""
+    closing = None
+    quote = False
+    # Whether a quote just ended, which in Markdown would continue on the next line.
+    quote_ended = False
+    table = False
+    for line in _jira_block_lines(lines):
+        if closing:
+            if line == closing:
+                closing = None
+                yield '```'
+            else:
+                yield line
+            continue
+        if quote_ended and line != '{quote}' and not _J_QUOTE.match(line):
+            quote_ended = False
+            if line.strip():
+                yield ''
+        if line == '{quote}':
+            quote = not quote
+            quote_ended = not quote
+            continue
+        match = _J_CODE.fullmatch(line)
+        if match:
+            closing = '{' + line[1:].split(':')[0].rstrip('}') + '}'
+            yield f'```{_code_language(match.group(1))}'
+            continue
+        prefix = '> ' if quote else ''
+        if _TABLE_ROW.match(line):
+            cells, header = _jira_table_row(line)
+            if not table and not header:
+                # Markdown tables need a header row.
+                yield prefix + '| ' + ' | '.join('' for _ in cells) + ' |'
+            yield prefix + '| ' + ' | '.join(cells) + ' |'
+            if not table:
+                yield prefix + '| ' + ' | '.join('---' for _ in cells) + ' |'
+            table = True
+            continue
+        table = False
+        if _J_RULE.match(line):
+            # *** rather than ---, which would make the previous line a heading.
+            yield prefix + '***'
+        elif match := _J_HEADING.match(line):
+            yield prefix + '#' * int(match.group(1)) + ' ' + _jira_inline(match.group(2))
+        elif match := _J_QUOTE.match(line):
+            yield '> ' + _jira_inline(match.group(1))
+            quote_ended = not quote
+        elif match := _J_LIST.match(line):
+            markers = '*' if match.group(1) == '-' else match.group(1)
+            indent = ''.join('   ' if marker == '#' else '  ' for marker in markers[:-1])
+            bullet = '1.' if markers[-1] == '#' else '-'
+            yield prefix + f'{indent}{bullet} ' + _jira_inline(match.group(2))
+        elif line.strip():
+            yield prefix + _jira_inline(line.strip())
+        else:
+            yield prefix.rstrip()
+    if closing:
+        yield '```'
+
+
+def jira_to_markdown(text: str) -> str:
+    """Convert Jira wiki markup to Markdown."""
+    return '\n'.join(iter_jira_to_markdown(text.splitlines()))
+
+
+# Markdown to Jira
+
+_M_FENCE = re.compile(r'^\s*(`{3,}|~{3,})\s*([\w+#.-]*)')
+_M_HEADING = re.compile(r'^\s*(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')
+_M_QUOTE = re.compile(r'^\s*>\s?(.*)$')
+_M_LIST = re.compile(r'^(\s*)([-*+]|\d+[.)])\s+(.*)$')
+_M_RULE = re.compile(r'^\s*([-*_])(?:\s*\1){2,}\s*$')
+_M_TABLE_SEPARATOR = re.compile(r'^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$')
+_M_TABLE_CELL = re.compile(r'(?<!\\)\|')
+_M_CODE = re.compile(r'(`+)(.+?)\1')
+_M_IMAGE = re.compile(r'!\[[^\]]*\]\(([^)\s]+)(?:\s+"[^"]*")?\)')
+_M_LINK = re.compile(r'\[([^\]]+)\]\(([^)\s]+)(?:\s+"[^"]*")?\)')
+_M_AUTOLINK = re.compile(r'<((?:https?|ftp|mailto):[^>\s]+)>')
+_M_EMPHASIS = [
+    (re.compile(r'(?<![\\*])\*\*\*(?=[^\s*])(.+?)(?<=[^\s\\*])\*\*\*(?!\*)'), _BOLD + r'_\1_' + _BOLD),
+    (re.compile(r'(?<![\\*])\*\*(?=[^\s*])(.+?)(?<=[^\s\\*])\*\*(?!\*)'), _BOLD + r'\1' + _BOLD),
+    (re.compile(r'(?<![\w\\_])__(?=[^\s_])(.+?)(?<=[^\s\\_])__(?![\w_])'), _BOLD + r'\1' + _BOLD),
+    (re.compile(r'(?<![\\~])~~(?=[^\s~])(.+?)(?<=[^\s\\~])~~(?!~)'), r'-\1-'),
+    (_emphasis('*'), r'_\1_'),
+    (re.compile(r'<(?:u|ins)>(.+?)</(?:u|ins)>'), r'+\1+'),
+    (re.compile(r'<(?:s|del)>(.+?)</(?:s|del)>'), r'-\1-'),
+    (re.compile(r'<sup>(.+?)</sup>'), r'^\1^'),
+    (re.compile(r'<sub>(.+?)</sub>'), r'~\1~'),
+]
+
+
+def _markdown_link(match: re.Match[str], spans: _Spans) -> str:
+    text, target = match.group(1), match.group(2)
+    if text == target:
+        return spans.hold(f'[{target}]')
+    return f'[{text}|' + spans.hold(target) + ']'
+
+
+def _markdown_protect(text: str, spans: _Spans) -> str:
+    text = _ESCAPE.sub(lambda m: spans.hold(m.group(0)), text)
+    text = _M_CODE.sub(lambda m: spans.hold('{{' + m.group(2).strip() + '}}'), text)
+    text = _M_IMAGE.sub(lambda m: spans.hold(f'!{m.group(1)}!'), text)
+    text = _M_LINK.sub(lambda m: _markdown_link(m, spans), text)
+    text = _M_AUTOLINK.sub(lambda m: spans.hold(f'[{m.group(1)}]'), text)
+    return _URL.sub(lambda m: spans.hold(m.group(0)), text)
+
+
+def _markdown_emphasis(text: str) -> str:
+    for pattern, replacement in _M_EMPHASIS:
+        text = pattern.sub(replacement, text)
+    return text.replace(_BOLD, '*')
+
+
+def _markdown_inline(text: str) -> str:
+    if not _MARKUP.search(text):
+        return text
+    spans = _Spans()
+    return spans.restore(_markdown_emphasis(_markdown_protect(text, spans)))
+
+
+def _markdown_table_row(line: str) -> list[str]:
+    spans = _Spans()
+    line = line.strip()
+    line = line.removeprefix('|')
+    line = line[:-1] if line.endswith('|') and not line.endswith('\\|') else line
+    cells = _M_TABLE_CELL.split(_markdown_protect(line, spans))
+    return [spans.restore(_markdown_emphasis(cell.strip())) or ' ' for cell in cells]
+
+
+def iter_markdown_to_jira(lines: Iterable[str]) -> Iterator[str]:
+    """Convert lines of Markdown to lines of Jira wiki markup."""
+    fence = None
+    quote = False
+    table = False
+    # A table row is held until the next line tells whether it is the header.
+    pending: list[str] | None = None
+    # Indents and markers (* or #) of the enclosing list items.
+    lists: list[tuple[int, str]] = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if fence:
+            if line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+                fence = None
+                yield '{code}'
+            else:
+                yield line
+            continue
+        if pending is not None:
+            if _M_TABLE_SEPARATOR.match(line) and '-' in line:
+                if any(cell.strip() for cell in pending):
+                    yield '||' + '||'.join(pending) + '||'
+                pending = None
+                table = True
+                continue
+            yield '|' + '|'.join(pending) + '|'
+            pending = None
+            table = True
+        if _TABLE_ROW.match(line):
+            if table:
+                yield '|' + '|'.join(_markdown_table_row(line)) + '|'
+            else:
+                pending = _markdown_table_row(line)
+            continue
+        table = False
+        match = _M_QUOTE.match(line)
+        if match:
+            if not quote:
+                quote = True
+                yield '{quote}'
+            line = match.group(1)
+        elif quote:
+            quote = False
+            yield '{quote}'
+        if match := _M_FENCE.match(line):
+            fence = match.group(1)
+            yield '{code:' + match.group(2) + '}' if match.group(2) else '{code}'
+            continue
+        if _M_RULE.match(line):
+            yield '----'
+            lists = []
+        elif match := _M_HEADING.match(line):
+            yield f'h{len(match.group(1))}. ' + _markdown_inline(match.group(2))
+            lists = []
+        elif match := _M_LIST.match(line):
+            indent = len(match.group(1).expandtabs(4))
+            marker = '#' if match.group(2)[0].isdigit() else '*'
+            while lists and lists[-1][0] > indent:
+                lists.pop()
+            if lists and lists[-1][0] == indent:
+                lists[-1] = (indent, marker)
+            else:
+                lists.append((indent, marker))
+            yield ''.join(marker for _, marker in lists) + ' ' + _markdown_inline(match.group(3))
+        elif line.strip():
+            if not line[:1].isspace():
+                lists = []
+            yield _markdown_inline(line.strip())
+        else:
+            yield ''
+    if pending is not None:
+        yield '|' + '|'.join(pending) + '|'
+    if quote:
+        yield '{quote}'
+    if fence:
+        yield '{code}'
+
+
+def markdown_to_jira(text: str) -> str:
+    """Convert Markdown to Jira wiki markup."""
+    return '\n'.join(iter_markdown_to_jira(text.splitlines()))
@@ -1,9 +1,11 @@
+from .async_jira_client import AsyncJiraClient
 from .jira_auth import JiraAuth
 from .jira_client import JiraClient
 from .jira_issues import JiraIssue, JiraIssues
 from .config_loader import JiraSystemConfigLoader
 
 all = {
+    "AsyncJiraClient": AsyncJiraClient,
     "JiraAuth": JiraAuth,
     "JiraClient": JiraClient,
     "JiraIssue": JiraIssue,
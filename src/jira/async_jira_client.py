@@ -0,0 +1,115 @@
+import asyncio
+from collections.abc import AsyncGenerator, Iterable
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Self
+
+import httpx
+
+from mantis import json_codec
+from mantis.async_http import AsyncHttp
+
+if TYPE_CHECKING:
+    from mantis.mantis_client import MantisClient
+
+
+class AsyncJiraClient:
+    """Asyncio counterpart to JiraClient with the same request methods.
+
+    Meant for bulk commands that fan out many requests at once:
+
+        async with AsyncJiraClient(mantis) as jira:
+            issues = await jira.get_issues(keys)
+
+    Unlike JiraClient, failed requests are not printed and exited on, but raise
+    httpx.HTTPStatusError so that one failure does not abort the other tasks.
+    Nothing is read from or written to the cache.
+    """
+
+    def __init__(self, mantis: 'MantisClient', transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self.mantis = mantis
+        self.http = AsyncHttp(mantis, transport)
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.http.aclose()
+
+    @property
+    def project_name(self) -> str:
+        return self.mantis.jira.project_name
+
+    @staticmethod
+    def _json(response: httpx.Response) -> Any:
+        response.raise_for_status()
+        return json_codec.loads(response.content)
+
+    async def get_issue(self, key: str, expand: str | None = None, fields: list[str] | None = None) -> dict[str, dict]:
+        params = {}
+        if expand:
+            params['expand'] = expand
+        if fields:
+            params['fields'] = ','.join(fields)
+        return self._json(await self.http._get(f"issue/{key}", params))
+
+    async def get_issues(
+        self, keys: Iterable[str], expand: str | None = None, fields: list[str] | None = None
+    ) -> list[dict[str, dict]]:
+        """Fetch several issues concurrently, returned in the order of keys."""
+        return await asyncio.gather(*(self.get_issue(key, expand, fields) for key in keys))
+
+    async def get_editmeta(self, issue_key: str) -> dict[str, Any]:
+        return self._json(await self.http._get(f"issue/{issue_key}/editmeta"))
+
+    async def get_field_names(self, issue_key: str) -> dict[str, Any]:
+        return self._json(await self.http._get(f"issue/{issue_key}", {'expand': 'names'}))
+
+    async def get_issuetypes(self) -> dict[str, list[dict[str, Any]]]:
+        issuetypes = self._json(await self.http._get(f'issue/createmeta/{self.project_name}/issuetypes'))
+        assert 'issueTypes' in issuetypes, f"'issueTypes' not in issuetypes. Got keys: {list(issuetypes.keys())}"
+        return issuetypes
+
+    async def get_createmeta(self, issuetype_id: str) -> dict[str, int | list[dict[str, Any]]]:
+        """Createmeta dict with a list of fields called 'fields'"""
+        url = f"issue/createmeta/{self.project_name}/issuetypes/{issuetype_id}"
+        data = self._json(await self.http._get(url))
+        assert 'fields' in data, f'Key "fields" not in data.keys(). Got: {data.keys()} ... {data}'
+        return data
+
+    async def search_issues(self, jql: str, page_size: int = 100) -> AsyncGenerator[dict[str, Any], None]:
+        """Page through the search endpoint, yielding each matching issue as it arrives."""
+        start_at = 0
+        while True:
+            params = {
+                'jql': jql,
+                'startAt': start_at,
+                'maxResults': page_size,
+                'fields': '*all',
+            }
+            page = self._json(await self.http._get('search', params))
+            issues = page.get('issues', [])
+            for issue in issues:
+                yield issue
+            start_at += len(issues)
+            if not issues or start_at >= page.get('total', 0):
+                break
+
+    async def get_projects(self) -> list[dict[str, Any]]:
+        return self._json(await self.http._get('project'))
+
+    async def get_current_user(self) -> dict[str, str]:
+        return self._json(await self.http._get("myself"))
+
+    async def post_issue(self, data: dict) -> dict:
+        """Post a new issue to Jira"""
+        return self._json(await self.http._post("issue", data=data))
+
+    async def update_field(self, key: str, data: dict) -> bool:
+        response = await self.http._put(f"issue/{key}", data)
+        response.raise_for_status()
+        return True
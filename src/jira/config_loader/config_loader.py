@@ -1,4 +1,9 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import hashlib
 import json
+import multiprocessing
+import threading
+import time
 
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Generator
@@ -7,28 +12,67 @@ import warnings
 from datamodel_code_generator import DataModelType, InputFileType, generate
 from pydantic import PydanticDeprecatedSince20
 
+from mantis import json_codec
 from mantis.cache import CacheMissException
 from jira.config_loader.inspector import Inspector
-from jira.config_loader.meta_model_factories import CreatemetaModelFactory
+from jira.config_loader.meta_model_factories import CreatemetaModelFactory, EditmetaModelFactory
 
 if TYPE_CHECKING:
     from jira.jira_client import JiraClient
     from mantis.cache import Cache
 
 
+def _is_up_to_date(input_file: Path, output_path: Path) -> bool:
+    """The plugin exists and was written after the cache file last changed.
+
+    Entries that are not files on disk (e.g. in the SQLite backend) are never up to date.
+    """
+    try:
+        return output_path.stat().st_mtime_ns >= input_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def _generate_plugin(content: str, input_filename: str, output_path: Path) -> float:
+    """Run in a worker process. Returns the time spent generating the plugin."""
+    start = time.perf_counter()
+    warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
+    generate(
+        content,
+        input_file_type=InputFileType.Json,
+        input_filename=input_filename,
+        output=output_path,
+        output_model_type=DataModelType.PydanticV2BaseModel,
+    )
+    return time.perf_counter() - start
+
+
 class JiraSystemConfigLoader:
     def __init__(self, jira: "JiraClient") -> None:
         self.jira = jira
+        # Createmeta is shared by all issues of a type, so each factory is built once
+        # per (issuetype, payload) and reused until the createmeta changes.
+        self._createmeta_factories: dict[tuple[str, str], CreatemetaModelFactory] = {}
+        # Held while a factory is built, so that concurrent drafts of a type build it only once.
+        self._createmeta_factories_lock = threading.Lock()
+        # Background refreshes of expired entries (see Cache._check_freshness).
+        self.cache.refreshers.update({
+            "projects": lambda file: self._fetch_projects(),
+            "issuetypes": lambda file: self._fetch_issuetypes(),
+            "createmeta": lambda file: self._fetch_createmeta(file.stem.removeprefix("createmeta_")),
+            "editmeta": lambda file: self._fetch_editmeta(file.stem.removeprefix("editmeta_")),
+        })
 
     def attempt(self, issue_id: str, issuetype_name: str) -> None:
-        with open(f".jira_cache/issues/{issue_id}.json", "r") as f:
-            data = json.load(f)
+        data = self.cache.get_issue(issue_id)
+        if not data:
+            raise CacheMissException(f"{issue_id}")
 
         metadata = self.jira.mantis.cache.get_createmeta_from_cache(issuetype_name)
         if not metadata:
             raise CacheMissException(f"{issuetype_name}")
         assert isinstance(metadata, dict)
-        fields = CreatemetaModelFactory(metadata, issuetype_name, self.jira)
+        fields = self.get_createmeta_factory(issuetype_name, metadata)
         loaded = fields.make(data)
         assert loaded.key == issue_id  # type: ignore
         print(loaded.key)  # type: ignore
@@ -40,11 +84,11 @@ class JiraSystemConfigLoader:
         return self.jira.mantis.cache
 
     def loop_createmeta(self) -> Generator[Path, Any, None]:
-        for file in self.cache.createmeta.iterdir():
+        for file in self.cache.iter_dir("createmeta"):
             yield file
 
     def loop_editmeta(self) -> Generator[Path, Any, None]:
-        for file in self.cache.editmeta.iterdir():
+        for file in self.cache.iter_dir("editmeta"):
             yield file
 
     def get_projects(self, force_skip_cache: bool = False) -> list[dict[str, Any]]:
@@ -53,8 +97,11 @@ class JiraSystemConfigLoader:
             if projects:
                 assert isinstance(projects, list), f"To satisfy the type checker. Got: {projects}"
                 return projects
-        projects = self.jira.get_projects()
-        self.cache.write_to_system_cache("projects.json", json.dumps(projects))
+        return self._fetch_projects()
+
+    def _fetch_projects(self) -> list[dict[str, Any]]:
+        projects = self._fetch_metadata('project', self.cache.system / "projects.json")
+        assert isinstance(projects, list), f'Expected projects to be a list. Got: {type(projects)}'
         return projects
 
     def get_issuetypes(self, force_skip_cache: bool = False) -> dict[str, list[dict[str, Any]]]:
@@ -62,13 +109,16 @@ class JiraSystemConfigLoader:
             from_cache = self.cache.get_issuetypes_from_system_cache()
             if from_cache:
                 return from_cache
-        issuetypes = self.jira.get_issuetypes()
+        return self._fetch_issuetypes()
+
+    def _fetch_issuetypes(self) -> dict[str, list[dict[str, Any]]]:
+        url = f'issue/createmeta/{self.jira.project_name}/issuetypes'
+        issuetypes = self._fetch_metadata(url, self.cache.system / "issuetypes.json")
         assert isinstance(issuetypes, dict)
         if len(issuetypes.keys()) == 0:
             raise ValueError(
                 'List of issuetypes has length of zero. Something is probably very wrong.')
-        assert 'issueTypes' in issuetypes, f'issueTypes has no issueTypes {issuetypes}'
-        self.cache.write_issuetypes_to_system_cache(issuetypes)
+        self.jira.check_issuetypes(issuetypes)
         return issuetypes
 
     def get_createmeta(self, issuetype_name: str, force_skip_cache: bool = False) -> dict[str, int | list[dict[str, Any]]]:
@@ -76,8 +126,12 @@ class JiraSystemConfigLoader:
             from_cache = self.cache.get_createmeta_from_cache(issuetype_name)
             if from_cache:
                 return from_cache
+        return self._fetch_createmeta(issuetype_name)
+
+    def _fetch_createmeta(self, issuetype_name: str) -> dict[str, int | list[dict[str, Any]]]:
         issuetype_id = self.jira.issuetype_name_to_id(issuetype_name)
-        createmeta = self.jira.get_createmeta(issuetype_id)
+        url = f"issue/createmeta/{self.jira.project_name}/issuetypes/{issuetype_id}"
+        createmeta = self._fetch_metadata(url, self.cache.createmeta / f"createmeta_{issuetype_name.lower()}.json")
         if not isinstance(createmeta, dict):
             raise ValueError(f'The createmeta object should be a dict. Got: {type(createmeta)}')
         if len(createmeta.keys()) == 0:
@@ -85,14 +139,49 @@ class JiraSystemConfigLoader:
                 'No content in createmeta. Something is probably very wrong.')
         if 'fields' not in createmeta:
             raise ValueError(f'The createmeta has no fields. Got: {createmeta.keys()}')
-        self.cache.write_createmeta(issuetype_name, createmeta)
         return createmeta
 
+    def _fetch_metadata(self, uri: str, file: Path) -> Any:
+        """Fetch a metadata payload into the cache entry at file.
+
+        If the entry was stored with an ETag or Last-Modified validator, the
+        request is conditional. On 304 Not Modified the cached body is kept and
+        only the time it was last checked is updated.
+        """
+        cached = self.cache.read_bytes(file)
+        validators = self.cache.get_validators(file) if cached is not None else {}
+        payload, new_validators = self.jira.get_metadata(uri, validators)
+        if payload is None:
+            assert cached is not None
+            payload = json_codec.loads(cached)
+            # Rewrite the unchanged body, so that the entry counts as fresh again.
+            self.cache.write(file, cached)
+        else:
+            self.cache.write(file, json_codec.dumps(payload))
+        if new_validators:
+            self.cache.write_validators(file, {**new_validators, 'checked': time.time()})
+        return payload
+
+    def get_createmeta_factory(
+            self, issuetype_name: str, createmeta: dict[str, Any] | None = None) -> CreatemetaModelFactory:
+        """Get the shared factory for an issuetype, building it only when its createmeta changed."""
+        if createmeta is None:
+            createmeta = self.get_createmeta(issuetype_name)
+        digest = hashlib.sha256(json.dumps(createmeta, sort_keys=True).encode()).hexdigest()
+        registry_key = (issuetype_name.lower(), digest)
+        with self._createmeta_factories_lock:
+            if registry_key not in self._createmeta_factories:
+                self._createmeta_factories[registry_key] = CreatemetaModelFactory(createmeta, issuetype_name, self.jira)
+            return self._createmeta_factories[registry_key]
+
     def get_editmeta(self, issue_key: str, force_skip_cache: bool = False) -> dict[str, int | list[dict[str, Any]]]:
         if not self.jira.mantis._no_read_cache or force_skip_cache:
             from_cache = self.cache.get_editmeta_from_cache(issue_key)
             if from_cache:
                 return from_cache
+        return self._fetch_editmeta(issue_key)
+
+    def _fetch_editmeta(self, issue_key: str) -> dict[str, int | list[dict[str, Any]]]:
         editmeta = self.jira.get_editmeta(issue_key)
         if not isinstance(editmeta, dict):
             raise ValueError(f'The editmeta object should be a dict. Got: {type(editmeta)}')
@@ -114,7 +203,29 @@ class JiraSystemConfigLoader:
             issuetype_name: str = issuetype_data['name']
             data = self._update_single_createmeta(issuetype_name)
             # Run CreatemetaModelFactory to dump schemas
-            _ = CreatemetaModelFactory(data, issuetype_name, self.jira)
+            _ = self.get_createmeta_factory(issuetype_name, data)
+        return self.jira.issues.load_allowed_types()
+
+    def refresh_system_metadata(self) -> list[str]:
+        """Refetch projects, issuetypes and every createmeta, leaving issues and editmeta cached.
+
+        Entries are revalidated, so metadata that did not change costs a 304 each.
+        The createmeta of issuetypes that no longer exist is dropped. Returns the
+        updated list of allowed types.
+        """
+        self._fetch_projects()
+        issuetypes = self._fetch_issuetypes()
+        names = [issuetype['name'] for issuetype in issuetypes['issueTypes']]
+        for issuetype_name in names:
+            data = self._fetch_createmeta(issuetype_name)
+            _ = self.get_createmeta_factory(issuetype_name, data)
+        current = {name.lower() for name in names}
+        with self.cache.batch():
+            # Removed by name, since filtering invalidate_entries by issuetype reads every cached issue.
+            for identifier, prefix in (("createmeta", "createmeta_"), ("createmeta_schemas", "")):
+                for file in list(self.cache.iter_dir(identifier)):
+                    if file.stem.removeprefix(prefix) not in current:
+                        self.cache.remove(self.cache._relative(file))
         return self.jira.issues.load_allowed_types()
 
     def _update_single_createmeta(self, issuetype_name: str) -> dict[str, Any]:
@@ -130,36 +241,72 @@ class JiraSystemConfigLoader:
         self.cache.write_editmeta(issue_key, data)
         return data
 
-    def compile_plugins(self) -> None:
+    def compile_meta_plugins(self) -> list[str]:
+        """Generate the createmeta and editmeta model plugins for everything in the cache.
+
+        Plugins whose schema has not changed are skipped. Returns the names of the
+        issuetypes and issue keys that were compiled.
+        """
+        compiled: list[str] = []
         for input_file in self.cache.iter_dir("createmeta"):
-            with open(input_file, "r") as f:
-                content = f.read()
-            # Remove the .json extension
-            name = input_file.name[:-5].replace("-", "_").replace("_", "_").lower()
-            output_path = self.jira.mantis.plugins_dir / f"{name}.py"
-            warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
-            generate(
-                content,
-                input_file_type=InputFileType.Json,
-                input_filename=str(input_file),
-                output=output_path,
-                output_model_type=DataModelType.PydanticV2BaseModel,
-            )
-        for input_file in self.jira.mantis.cache.iter_dir("issues"):
-            print(f'input_file: {input_file}')
-            with open(input_file, "r") as f:
-                content = f.read()
-            # Remove the .json extension
-            name = input_file.name[:-5].replace("-", "_").replace("_", "_").lower()
-            output_path = self.jira.mantis.plugins_dir / f"{name}.py"
-            warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
-            generate(
-                content,
-                input_file_type=InputFileType.Json,
-                input_filename=str(input_file),
-                output=output_path,
-                output_model_type=DataModelType.PydanticV2BaseModel,
-            )
+            # createmeta_task.json -> task
+            issuetype_name = input_file.stem.removeprefix("createmeta_")
+            self.get_createmeta_factory(issuetype_name)._write_plugin()
+            compiled.append(issuetype_name)
+        for input_file in self.cache.iter_dir("editmeta"):
+            # editmeta_ecs-1.json -> ECS-1
+            issue_key = input_file.stem.removeprefix("editmeta_").upper()
+            issue_data = self.cache.get_issue(issue_key) or {}
+            issuetype_name = issue_data.get('fields', {}).get('issuetype', {}).get('name', '')
+            EditmetaModelFactory(self.get_editmeta(issue_key), issuetype_name, self.jira, issue_key, write_plugin=True)
+            compiled.append(issue_key)
+        return compiled
+
+    def _plugin_jobs(self) -> Generator[tuple[Path, Path], None, None]:
+        for identifier in ("createmeta", "issues"):
+            for input_file in self.cache.iter_dir(identifier):
+                # Remove the .json extension
+                name = input_file.name[:-5].replace("-", "_").lower()
+                yield input_file, self.jira.mantis.plugins_dir / f"{name}.py"
+
+    def compile_plugins(self, max_workers: int | None = None) -> dict[Path, float]:
+        """Generate a model plugin for every cached createmeta and issue on a process pool.
+
+        Inputs whose plugin is newer than the cache file are skipped. Returns the
+        time spent generating each plugin, keyed by output path.
+
+        Workers are spawned rather than forked, since this process may already run
+        threads (fetches and cache refreshes) whose locks a fork would copy held.
+        """
+        max_workers = max_workers or self.jira.mantis.options.compile_workers
+        jobs = []
+        skipped = 0
+        for input_file, output_path in self._plugin_jobs():
+            if _is_up_to_date(input_file, output_path):
+                skipped += 1
+                continue
+            content = self.cache.read(input_file)
+            assert content is not None, f'Cache entry disappeared while compiling: {input_file}'
+            jobs.append((content, str(input_file), output_path))
+
+        timings: dict[Path, float] = {}
+        start = time.perf_counter()
+        if jobs:
+            with ProcessPoolExecutor(
+                max_workers=min(max_workers, len(jobs)), mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                futures = {executor.submit(_generate_plugin, *job): job[2] for job in jobs}
+                for future in as_completed(futures):
+                    timings[futures[future]] = future.result()
+                    print(f'{timings[futures[future]]:7.2f}s {futures[future].name}')
+        elapsed = time.perf_counter() - start
+        serial = sum(timings.values())
+        speedup = serial / elapsed if elapsed else 1.0
+        print(
+            f'Compiled {len(timings)} plugins in {elapsed:.2f}s on {max_workers} workers '
+            f'({serial:.2f}s serial, {speedup:.1f}x speedup). Skipped {skipped} up to date.'
+        )
+        return timings
 
     def inspect(self) -> None:
         Inspector.inspect(self.jira)
@@ -52,7 +52,7 @@ class Inspector:
             if not metadata:
                 raise CacheMissException(f"{issuetype}")
             assert isinstance(metadata, dict)
-            d[issuetype] = CreatemetaModelFactory(metadata, issuetype, jira)
+            d[issuetype] = jira.system_config_loader.get_createmeta_factory(issuetype, metadata)
         return d
 
     @staticmethod
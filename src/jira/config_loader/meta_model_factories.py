@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+import hashlib
 import json
 
+from pathlib import Path
 from typing import TYPE_CHECKING, Any, ClassVar, Dict, Generator, KeysView, Optional
 import warnings
 
@@ -132,6 +134,27 @@ class MetaModelFactory(ABC):
     def make(self, issue_payload: dict) -> BaseModel:
         return self.model.model_validate(issue_payload)
 
+    @staticmethod
+    def _generate_plugin(schema: dict[str, Any], output_plugin: Path) -> bool:
+        """Generate a plugin from the schema, unless it was already generated from the same schema.
+
+        The hash of the schema is stored next to the plugin (e.g. task_createmeta.sha256).
+        Returns whether the plugin was (re)generated.
+        """
+        digest = hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+        hash_file = output_plugin.with_suffix('.sha256')
+        if output_plugin.exists() and hash_file.exists() and hash_file.read_text() == digest:
+            return False
+        warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
+        generate(
+            json.dumps(schema),
+            input_file_type=InputFileType.JsonSchema,
+            output=output_plugin,
+            output_model_type=DataModelType.PydanticV2BaseModel,
+        )
+        hash_file.write_text(digest)
+        return True
+
 
 class CreatemetaModelFactory(MetaModelFactory):
     process = 'createmeta'
@@ -141,7 +164,7 @@ class CreatemetaModelFactory(MetaModelFactory):
         "timespent",
     }
 
-    def __init__(self, metadata: Dict[str, Any], issuetype_name: str, jira: "JiraClient", write_plugin: bool=True) -> None:
+    def __init__(self, metadata: Dict[str, Any], issuetype_name: str, jira: "JiraClient", write_plugin: bool | None=None) -> None:
         super().__init__(metadata)
         self.jira = jira
         self.issuetype_name = issuetype_name
@@ -152,6 +175,8 @@ class CreatemetaModelFactory(MetaModelFactory):
             raise TypeError(
                 f'CreatemetaModelFactory.meta_fields should be of type list. Got: {type(self.meta_fields)}')
         self.create_model()
+        if write_plugin is None:
+            write_plugin = not self.jira.mantis.options.defer_plugins
         if write_plugin:
             self._write_plugin()
 
@@ -159,13 +184,7 @@ class CreatemetaModelFactory(MetaModelFactory):
         schema = self.model.model_json_schema()
         self.jira.mantis.cache.write_createmeta_schema(self.issuetype_name, schema)
         output_plugin = self.jira.mantis.plugins_dir / f'{self.issuetype_name.lower()}_createmeta.py'
-        warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
-        generate(
-            json.dumps(schema),
-            input_file_type=InputFileType.JsonSchema,
-            output=output_plugin,
-            output_model_type=DataModelType.PydanticV2BaseModel,
-        )
+        self._generate_plugin(schema, output_plugin)
 
     def field_by_key(self, key: str, default: Any | None = None) -> Any | None:
         return next((item for item in self._iter_meta_fields if item.get('key') == key), default)
@@ -180,7 +199,7 @@ class EditmetaModelFactory(MetaModelFactory):
         "environment"
     }
 
-    def __init__(self, metadata: Dict[str, Any], issuetype_name: str, jira: "JiraClient", issue_key: str, write_plugin: bool=True) -> None:
+    def __init__(self, metadata: Dict[str, Any], issuetype_name: str, jira: "JiraClient", issue_key: str, write_plugin: bool | None=None) -> None:
         super().__init__(metadata)
         self.jira = jira
         self.issuetype_name = issuetype_name
@@ -192,6 +211,8 @@ class EditmetaModelFactory(MetaModelFactory):
             raise TypeError(
                 f'EditmetaModelFactory.meta_fields should be of type dict. Got: {type(self.meta_fields)}')
         self.create_model()
+        if write_plugin is None:
+            write_plugin = not self.jira.mantis.options.defer_plugins
         if write_plugin:
             self._write_plugin()
 
@@ -203,10 +224,4 @@ class EditmetaModelFactory(MetaModelFactory):
         schema = self.model.model_json_schema()
         self.jira.mantis.cache.write_editmeta_schema(self.issue_key, schema)
         output_plugin = self.jira.mantis.plugins_dir / f'{self.issue_key.lower()}_editmeta.py'
-        warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
-        generate(
-            json.dumps(schema),
-            input_file_type=InputFileType.JsonSchema,
-            output=output_plugin,
-            output_model_type=DataModelType.PydanticV2BaseModel,
-        )
+        self._generate_plugin(schema, output_plugin)
@@ -3,7 +3,10 @@ import re
 import shutil
 import requests
 
+from collections.abc import Generator
+from datetime import tzinfo
 from typing import TYPE_CHECKING, Any
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from jira.auto_complete import AutoComplete, Suggestion
 from jira.jira_issues import JiraIssues
@@ -73,16 +76,42 @@ class JiraClient:
         self._project_id = project_id
         return self._project_id
 
-    def get_issuetypes(self) -> dict[str, list[dict[str, Any]]]:
-        url = f'issue/createmeta/{self.project_name}/issuetypes'
-        response = self.mantis.http._get(url)
+    def get_metadata(self, uri: str, validators: dict[str, Any] | None = None) -> tuple[Any | None, dict[str, Any]]:
+        """Fetch a system metadata payload together with its ETag/Last-Modified validators.
+
+        With validators from an earlier response, the request is conditional and
+        the payload is None if Jira answers 304 Not Modified.
+        """
+        headers = {}
+        if validators and validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators and validators.get('last-modified'):
+            headers['If-Modified-Since'] = validators['last-modified']
+        response = self.mantis.http._get(uri, headers=headers)
+        if headers and response.status_code == 304:
+            return None, validators or {}
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
             print(e.response.reason)
             print(e.response.content)
             exit()
-        issuetypes: dict[str, list[dict[str, Any]]] = response.json()
+        new_validators = {
+            name: response.headers[header]
+            for name, header in (('etag', 'ETag'), ('last-modified', 'Last-Modified'))
+            if header in response.headers
+        }
+        return self.mantis.http.json(response), new_validators
+
+    def get_issuetypes(self) -> dict[str, list[dict[str, Any]]]:
+        url = f'issue/createmeta/{self.project_name}/issuetypes'
+        issuetypes, _ = self.get_metadata(url)
+        assert issuetypes is not None
+        self.check_issuetypes(issuetypes)
+        return issuetypes
+
+    @staticmethod
+    def check_issuetypes(issuetypes: dict[str, list[dict[str, Any]]]) -> None:
         assert isinstance(issuetypes, dict), f'issuetypes is not a dict: {issuetypes}'
         assert 'issueTypes' in issuetypes, f"'issueTypes' not in issuetypes. Got keys: {list(issuetypes.keys())}"
         assert isinstance(issuetypes['issueTypes'], list), f"issuetypes['issueTypes'] is not a list. Got: {issuetypes}"
@@ -92,7 +121,6 @@ class JiraClient:
             for y,z in x.items():
                 assert isinstance(y, str)
                 assert z is not None, f"key {y} is None"
-        return issuetypes
 
     def issuetype_name_to_id(self, issuetype_name: str) -> str:
         nested_issuetypes = self.system_config_loader.get_issuetypes().get('issueTypes', [{}])
@@ -105,9 +133,7 @@ class JiraClient:
     def get_createmeta(self, issuetype_id: str) -> dict[str, int | list[dict[str, Any]]]:
         """Createmeta dict with a list of fields called 'fields'"""
         url = f"issue/createmeta/{self.project_name}/issuetypes/{issuetype_id}"
-        response = self.mantis.http._get(url)
-        response.raise_for_status()
-        data = response.json()
+        data, _ = self.get_metadata(url)
         assert isinstance(data, dict)
         assert 'fields' in data.keys(), f'Key "fields" not in data.keys(). Got: {data.keys()} ... {data}'
         return data
@@ -117,17 +143,51 @@ class JiraClient:
         url = f"issue/{issue_key}/editmeta"
         response = self.mantis.http._get(url)
         response.raise_for_status()
-        return response.json()
+        return self.mantis.http.json(response)
 
-    def get_issue(self, key: str) -> dict[str, dict]:
-        response = self.mantis.http._get(f"issue/{key}")
+    def get_issue(self, key: str, expand: str | None = None, fields: list[str] | None = None) -> dict[str, dict]:
+        """Fetch an issue. With expand (e.g. "editmeta,names"), Jira embeds those
+        objects in the same response. With fields, only those fields are returned."""
+        params = {}
+        if expand:
+            params['expand'] = expand
+        if fields:
+            params['fields'] = ','.join(fields)
+        response = self.mantis.http._get(f"issue/{key}", params)
         try:
             response.raise_for_status()
         except requests.HTTPError as e:
             self.handle_http_error(e, key)
-        issue_data: dict[str, dict] = response.json()
+        issue_data: dict[str, dict] = self.mantis.http.json(response)
         return issue_data
 
+    def search_issues(self, jql: str, page_size: int = 100) -> Generator[dict[str, Any], None, None]:
+        """Page through the search endpoint, yielding each matching issue as it arrives.
+
+        https://developer.atlassian.com/cloud/jira/platform/rest/v3/api-group-issue-search/#api-rest-api-3-search-get
+        """
+        start_at = 0
+        while True:
+            params = {
+                'jql': jql,
+                'startAt': start_at,
+                'maxResults': page_size,
+                'fields': '*all',
+            }
+            response = self.mantis.http._get('search', params)
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                print(e.response.reason)
+                print(e.response.content)
+                exit()
+            page = self.mantis.http.json(response)
+            issues = page.get('issues', [])
+            yield from issues
+            start_at += len(issues)
+            if not issues or start_at >= page.get('total', 0):
+                break
+
     def post_issue(self, data: dict) -> dict:
         """Post a new issue to Jira"""
         response = self.mantis.http._post("issue", data=data)
@@ -137,7 +197,7 @@ class JiraClient:
             print(e.response.reason)
             print(e.response.json())
             exit()
-        return response.json()
+        return self.mantis.http.json(response)
 
     def warmup(self, delete_drafts: bool=False) -> None:
         if delete_drafts:
@@ -145,37 +205,37 @@ class JiraClient:
                 # This violently removes everything. Don't store anything important in the drafts_dir.
                 shutil.rmtree(self.mantis.drafts_dir)
                 self.mantis.drafts_dir.mkdir(exist_ok=True)
-        self.mantis.cache.invalidate()
-        self.system_config_loader.get_projects(force_skip_cache = True)
-        assert not self.mantis.cache.get_issuetypes_from_system_cache()
-        self.system_config_loader.get_issuetypes(force_skip_cache = True)
-        assert self.mantis.cache.get_issuetypes_from_system_cache()
-        resp = self.system_config_loader.fetch_and_update_all_createmeta()
+        # Only system metadata is refreshed. Cached issues and editmeta are kept
+        # (see the invalidate-cache action to drop those).
+        resp = self.system_config_loader.refresh_system_metadata()
         pprint(resp)
 
     def warmup_issues(self, *issue_keys: str) -> None:
-        for issue_key in issue_keys:
-            self.issues.get(key=issue_key).editmeta
+        # Network round-trips run concurrently; the models are built afterwards.
+        for issue in self.issues.get_many(issue_keys, with_editmeta=True):
+            _ = issue.editmeta
+            _ = issue.draft
         print(f'Fetched issues: {issue_keys}')
 
     def get_projects(self) -> list[dict[str, Any]]:
-        url = 'project'
-        response = self.mantis.http._get(url)
-        try:
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            print(e.response.reason)
-            print(e.response.content)
-            exit()
-        payload: list[dict[str, Any]] = response.json()
+        payload, _ = self.get_metadata('project')
+        assert isinstance(payload, list), f'Expected projects to be a list. Got: {type(payload)}'
         return payload
 
     def get_current_user(self) -> dict[str, str]:
         response = self.mantis.http._get("myself")
         response.raise_for_status()
-        data = response.json()
+        data = self.mantis.http.json(response)
         return data
 
+    def get_current_user_timezone(self) -> tzinfo | None:
+        """The timezone of the user's Jira profile, in which Jira reads the dates in JQL."""
+        name = self.get_current_user().get("timeZone")
+        try:
+            return ZoneInfo(name) if name else None
+        except ZoneInfoNotFoundError:
+            return None
+
     def get_current_user_account_id(self) -> str | None:
         return self.get_current_user().get("accountId")
 
@@ -206,7 +266,7 @@ class JiraClient:
             print (e.response.reason )
             print (e.response.json() )
             exit()
-        return response.json()
+        return self.mantis.http.json(response)
 
     def validate_input(self, search_field: str, search_name: str) -> list[Suggestion]:
         """Validate user input by checking it against the JQL auto-complete endpoint."""
@@ -278,4 +338,4 @@ class JiraClient:
         url = f"issue/{issue_key}?expand=names"
         response = self.mantis.http._get(url)
         response.raise_for_status()
-        return response.json()
+        return self.mantis.http.json(response)
@@ -1,16 +1,27 @@
+from collections.abc import Generator, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
 from pprint import pprint
+import re
 
 from typing import TYPE_CHECKING, Any
 
+from openai import OpenAIError
 from pydantic import BaseModel
+import requests
 
 from drafts import Draft
+from enums import TextFormat
 from jira.config_loader.meta_model_factories import CreatemetaModelFactory, EditmetaModelFactory
 from jira.issue_field import IssueField
 
 if TYPE_CHECKING:
     from .jira_client import JiraClient
 
+# e.g. "2025-05-19T00:45:14.992+0200"
+JIRA_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f%z'
+
 
 class JiraIssue:
     """Represents data reflecting an issue in Jira.
@@ -31,8 +42,7 @@ class JiraIssue:
     def __init__(self, jira: "JiraClient", raw_data: dict[str, Any]) -> None:
         self.jira = jira
         self.data = raw_data
-        # Only writes if not exists.
-        self.draft = Draft(self.jira.mantis, self)
+        self._draft: Draft | None = None
         self._createmeta_factory: CreatemetaModelFactory | None = None
         self._editmeta_factory: EditmetaModelFactory | None = None
         self._editmeta: Any | None = None
@@ -40,6 +50,13 @@ class JiraIssue:
     def get(self, key: str, default: Any = None) -> Any:
         return self.data.get(key, default) or default
 
+    @property
+    def draft(self) -> Draft:
+        """The draft of the issue, written to the drafts dir on first access if it does not exist."""
+        if self._draft is None:
+            self._draft = Draft(self.jira.mantis, self)
+        return self._draft
+
     @property
     def key(self) -> str:
         key = self.data.get('key')
@@ -60,13 +77,11 @@ class JiraIssue:
     @property
     def createmeta_factory(self) -> CreatemetaModelFactory:
         if self._createmeta_factory is None:
-            self._createmeta_factory = CreatemetaModelFactory(self.createmeta_data, self.issuetype, self.jira)
+            self._createmeta_factory = self.jira.system_config_loader.get_createmeta_factory(self.issuetype)
         return self._createmeta_factory
 
     @property
     def createmeta(self) -> BaseModel:
-        # TODO: Createmeta is shared for all issues of the same type.
-        #       Should be loaded into a shared object, not one per Issue
         return self.createmeta_factory.make(self.data)
 
     @property
@@ -86,6 +101,17 @@ class JiraIssue:
             self._editmeta = self.editmeta_factory.make(self.data)
         return self._editmeta
 
+    @property
+    def field_names(self) -> dict[str, str]:
+        """Display names of the fields of this issue, from the shared field names cache."""
+        cache = self.jira.mantis.cache
+        names = {} if self.jira.mantis._no_read_cache else cache.get_field_names()
+        if not self.fields.keys() <= names.keys():
+            # Issues cached before names were embedded in the fetch.
+            names = self.jira.get_field_names(self.key)['names']
+            cache.update_field_names(names)
+        return {key: names[key] for key in self.fields if key in names}
+
     @property
     def fields(self) -> dict[str, Any]:
         fields = self.data.get("fields")
@@ -125,7 +151,7 @@ class JiraIssue:
             fields.update(field.collect_field_for_update())
         # To-do: Check whether the description has been updated before posting it
         if input(f'Overwrite description of issue [{self.key}] "{self.get_field('description')}"? (y/n): ').lower() in ('y', 'yes'):
-            fields['description'] = self.draft.content
+            fields['description'] = self.draft.convert(self.draft.content, TextFormat.JIRA)
         if fields:
             print(f'Updating {', '.join(fields.keys())} with data: ({fields})')
             data = {
@@ -174,9 +200,14 @@ class JiraIssue:
 
 class JiraIssues:
     _allowed_types: list[str] | None = None
+    # Fields that JiraIssue.issuetype and draft generation always read.
+    REQUIRED_DRAFT_FIELDS = ('issuetype', 'summary', 'description')
+    # How far back from the latest synced update the next sync starts.
+    SYNC_OVERLAP = timedelta(minutes=2)
 
     def __init__(self, jira: "JiraClient"):
         self.jira = jira
+        self.jira.mantis.cache.refreshers["issues"] = self._refresh
 
     def load_allowed_types(self) -> list[str]:
         issuetypes = (
@@ -205,14 +236,179 @@ class JiraIssues:
                 raise ValueError('Loading allowed_types failed.')
         return self._allowed_types
 
-    def get(self, key: str, force_skip_cache: bool = False) -> JiraIssue:
+    @property
+    def draft_fields(self) -> list[str]:
+        """Fields needed to materialize and diff drafts: the frontmatter plus the description.
+
+        A configured list is completed with REQUIRED_DRAFT_FIELDS.
+        """
+        configured = self.jira.mantis.options.draft_fields
+        if configured is not None:
+            return configured + [field for field in self.REQUIRED_DRAFT_FIELDS if field not in configured]
+        # The header is not a Jira field.
+        return [field for field in Draft.REQUIRED_FRONTMATTER if field != 'header'] + ['description']
+
+    def get(self, key: str, force_skip_cache: bool = False, fields: list[str] | None = None) -> JiraIssue:
+        """Get an issue from the cache, or fetch it from upstream.
+
+        With fields, only those fields are fetched and the issue is kept in the
+        projected cache tier. A cached full issue satisfies any projection.
+        """
+        cache = self.jira.mantis.cache
         if not self.jira.mantis._no_read_cache and not force_skip_cache:
-            issue_data_from_cache = self.jira.mantis.cache.get_issue(key)
+            issue_data_from_cache = cache.get_issue(key)
+            if not issue_data_from_cache and fields:
+                issue_data_from_cache = cache.get_projected_issue(key, fields)
             if issue_data_from_cache:
                 return JiraIssue(self.jira, issue_data_from_cache)
-        data = self.jira.get_issue(key)
-        self.jira.mantis.cache.write_issue(key, data)
-        return JiraIssue(self.jira, data)
+        return JiraIssue(self.jira, self._fetch(key, fields))
+
+    def _fetch(self, key: str, fields: list[str] | None = None) -> dict[str, Any]:
+        data = self.jira.get_issue(key, expand='editmeta,names', fields=fields)
+        return self._write_expanded(key, data, fields)
+
+    def _refresh(self, file: Path) -> None:
+        """Refetch an expired issue in the background, keeping the tier it was cached in."""
+        fields = self.draft_fields if file.is_relative_to(self.jira.mantis.cache.projected_issues) else None
+        self._fetch(file.stem, fields)
+
+    def get_for_draft(self, key: str, force_skip_cache: bool = False) -> JiraIssue:
+        return self.get(key, force_skip_cache=force_skip_cache, fields=self.draft_fields)
+
+    def _write_expanded(self, key: str, data: dict[str, Any], fields: list[str] | None = None) -> dict[str, Any]:
+        """Split an issue fetched with expand=editmeta,names into its three caches.
+
+        Returns the issue data without the expanded objects.
+        """
+        issue_data = dict(data)
+        editmeta = issue_data.pop('editmeta', None)
+        names = issue_data.pop('names', None)
+        cache = self.jira.mantis.cache
+        with cache.batch():
+            if fields:
+                cache.write_projected_issue(key, fields, issue_data)
+            else:
+                cache.write_issue(key, issue_data)
+            if editmeta and 'fields' in editmeta:
+                cache.write_editmeta(key, editmeta)
+            if names:
+                cache.update_field_names(names)
+        return issue_data
+
+    def get_many(
+        self,
+        keys: Iterable[str],
+        max_workers: int | None = None,
+        force_skip_cache: bool = False,
+        with_editmeta: bool = False,
+        fields: list[str] | None = None,
+    ) -> list[JiraIssue]:
+        """Get several issues concurrently, returned in the order of keys.
+
+        Each key is looked up in the cache and, on a miss, fetched from upstream on a
+        bounded thread pool. Fetched issues are written to the cache as they arrive.
+        With with_editmeta, the editmeta of each issue is fetched in the same worker,
+        unless it already arrived embedded in the issue. Fields are passed on to get().
+        """
+        if max_workers is None:
+            max_workers = self.jira.mantis.options.max_workers
+
+        def fetch(key: str) -> JiraIssue:
+            issue = self.get(key, force_skip_cache=force_skip_cache, fields=fields)
+            if with_editmeta:
+                _ = issue.editmeta_data
+            return issue
+
+        with self.jira.mantis.cache.batch(), ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(fetch, keys))
+
+    def materialize_drafts(
+        self,
+        keys: Iterable[str] | None = None,
+        jql: str | None = None,
+        max_workers: int | None = None,
+    ) -> list[Draft]:
+        """Write the drafts of the given issues, or of the issues matching jql,
+        by default of every cached issue.
+
+        Drafts are rendered on a thread pool from the cached issues, fetching those
+        that are missing with only the fields drafts use. Conversions by the
+        assistant share the bounded lane of OpenAIClient. Existing drafts are left
+        as they are (see Draft.created). An issue that fails to fetch, convert or
+        write is reported and skipped, without holding up the other issues, and
+        the drafts are returned in the order of the keys.
+        """
+        cache = self.jira.mantis.cache
+        if jql:
+            keys = []
+            with cache.batch():
+                for data in self.jira.search_issues(jql):
+                    cache.write_issue(data['key'], data)
+                    keys.append(data['key'])
+        elif keys is None:
+            keys = sorted({
+                file.stem for identifier in ("issues", "issues_projected") for file in cache.iter_dir(identifier)
+            })
+        if max_workers is None:
+            max_workers = self.jira.mantis.options.draft_workers
+
+        def materialize(key: str) -> Draft:
+            try:
+                return self.get(key, fields=self.draft_fields).draft
+            except AttributeError as e:
+                # JiraClient.handle_http_error reports HTTP errors other than 404 as AttributeError.
+                if isinstance(e.__cause__, requests.HTTPError):
+                    raise e.__cause__ from None
+                raise
+
+        drafts = []
+        with cache.batch(), ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [(key, executor.submit(materialize, key)) for key in keys]
+            for key, future in futures:
+                try:
+                    drafts.append(future.result())
+                except (requests.RequestException, OpenAIError, ValueError, OSError) as e:
+                    print(f'Failed to materialize the draft of {key}: {e}')
+        return drafts
+
+    def sync(self, jql: str | None = None) -> Generator[dict[str, Any], None, None]:
+        """Pull issues changed since the last successful sync into the cache.
+
+        Pages through the search endpoint and writes each issue to the cache as it
+        arrives. The watermark is kept per query in the system cache and is only
+        moved forward once the generator has been exhausted.
+
+        The watermark is the latest update among the synced issues, less
+        SYNC_OVERLAP, in the timezone of the user's Jira profile (which is how
+        Jira reads it). JQL dates only have minutes, so the next sync fetches
+        the last few issues again rather than missing updates made in the same
+        minute. Writing them to the cache again is harmless.
+
+        The query must not have an ORDER BY, since issues are synced oldest update first.
+        """
+        base_jql = jql or f'project = {self.jira.project_name}'
+        if re.search(r'\border\s+by\b', base_jql, re.IGNORECASE):
+            raise ValueError(f'The sync query must not have an ORDER BY clause. Got: {base_jql}')
+        latest_update: datetime | None = None
+        last_sync = None
+        if not self.jira.mantis._no_read_cache:
+            last_sync = self.jira.mantis.cache.get_sync_watermark(base_jql)
+        # Parenthesized, so that the watermark applies to every clause of e.g. "project = A OR project = B".
+        query = f'({base_jql}) AND updated >= "{last_sync}"' if last_sync else base_jql
+        for data in self.jira.search_issues(f'{query} ORDER BY updated ASC'):
+            self.jira.mantis.cache.write_issue(data['key'], data)
+            if updated := data.get('fields', {}).get('updated'):
+                update = datetime.strptime(updated, JIRA_DATETIME_FORMAT)
+                if latest_update is None or update > latest_update:
+                    latest_update = update
+            yield data
+        if latest_update is None:
+            # Nothing changed since the last sync
+            return
+        # Without a profile timezone, Jira reads the dates in the timezone it reports updates in.
+        timezone = self.jira.get_current_user_timezone() or latest_update.tzinfo
+        watermark = (latest_update - self.SYNC_OVERLAP).astimezone(timezone)
+        self.jira.mantis.cache.write_sync_watermark(base_jql, watermark.strftime('%Y/%m/%d %H:%M'))
 
     def create(self, issuetype: str, title: str, data: dict) -> dict:
         """Create a new issue in Jira
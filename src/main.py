@@ -2,11 +2,14 @@
 
 import json
 from pprint import pprint
+import re
+import time
 
 from enums import TextFormat
 from jira.issue_field import IssueField
 from mantis.mantis_client import MantisClient
 from mantis.options_loader import OptionsLoader, parse_args
+from mantis.sqlite_cache import SqliteCache
 
 def main() -> None:
     options = OptionsLoader(parse_args())
@@ -25,12 +28,36 @@ def main() -> None:
         x = jira.system_config_loader.get_issuetypes()
         pprint (x)
     elif options.action == 'get-issue':
-        for issue_key in options.args:
-            issue = jira.issues.get(key=issue_key)
+        for issue in jira.issues.get_many(options.args):
             key = issue.get('key', 'N/A')
             title = issue.get_field('summary')
             print(f'[{key}] {title}')
         mantis._no_read_cache = False
+    elif options.action == 'materialize-drafts':
+        # Either issue keys, or a JQL query
+        if all(re.fullmatch(r'[A-Za-z][A-Za-z0-9_]*-\d+', arg) for arg in options.args):
+            keys, jql = options.args or None, None
+        else:
+            keys, jql = None, ' '.join(options.args)
+        started = time.perf_counter()
+        drafts = jira.issues.materialize_drafts(keys, jql)
+        elapsed = time.perf_counter() - started
+        for draft in drafts:
+            print(f'{'Created' if draft.created else 'Exists ':<7} {draft.draft_path}')
+        created = sum(draft.created for draft in drafts)
+        conversions = sum(draft.converted for draft in drafts)
+        print(
+            f'Created {created} of {len(drafts)} drafts in {elapsed:.2f}s ({len(drafts) / max(elapsed, 1e-9):.1f} drafts/s) '
+            f'on {options.draft_workers} workers. {conversions} descriptions converted by the assistant '
+            f'({options.chat_gpt_max_concurrency} at a time).'
+        )
+    elif options.action == 'sync':
+        jql = ' '.join(options.args) or None
+        synced = 0
+        for data in jira.issues.sync(jql):
+            print(f'[{data['key']}] {data['fields'].get('summary')}')
+            synced += 1
+        print(f'Synced {synced} issues')
     elif options.action == 'validate-values':
         search_name = 'Casper'
         search_field = 'reporter'
@@ -157,20 +184,25 @@ def main() -> None:
             field.check_field()
     elif options.action == 'update-issue-from-draft':
         for issue_key in options.args:
-            issue = jira.issues.get(key=issue_key)
+            issue = jira.issues.get_for_draft(issue_key)
             issue.update_from_draft()
     elif options.action == 'diff-issue-from-draft':
         for issue_key in options.args:
-            issue = jira.issues.get(key=issue_key)
+            issue = jira.issues.get_for_draft(issue_key)
             issue.diff_issue_from_draft()
     elif options.action == 'get-project-keys':
         print ('Fetching from Jira...')
+        # Revalidate the cached metadata rather than trusting it.
+        mantis._no_read_cache = True
         resp = jira.system_config_loader.fetch_and_update_all_createmeta()
+        mantis._no_read_cache = False
         print('Dumped field values for:')
         pprint(resp)
     elif options.action == 'inspect':
         jira.system_config_loader.inspect()
     elif options.action == 'compile-plugins':
+        compiled = jira.system_config_loader.compile_meta_plugins()
+        print(f'Compiled meta plugins for: {compiled}')
         jira.system_config_loader.compile_plugins()
     elif options.action == 'load-plugins':
         from plugins import Plugins
@@ -188,7 +220,25 @@ def main() -> None:
         print(IssueModel(**ecs_1))
         print(IssueModel.model_validate(ecs_1))
     elif options.action == 'invalidate-cache':
-        mantis.cache.invalidate()
+        if options.args or options.issuetype or options.keys or options.older_than is not None:
+            removed = mantis.cache.invalidate_entries(
+                options.args or None, options.issuetype, options.keys, options.older_than
+            )
+            print(f'Removed {removed} cache entries')
+        else:
+            mantis.cache.invalidate()
+    elif options.action == 'migrate-cache':
+        sqlite_cache = mantis.cache if isinstance(mantis.cache, SqliteCache) else SqliteCache(mantis)
+        imported = sqlite_cache.import_directory_layout()
+        print(f'Imported {imported} cache entries into {mantis.cache_dir / SqliteCache.database_name}')
+        print('Set backend = "sqlite" under [cache] in mantis.toml to use it')
+    elif options.action == 'compress-cache':
+        if isinstance(mantis.cache, SqliteCache):
+            print('compress-cache only applies to the files backend')
+        else:
+            train = options.cache_compression == 'zstd' and 'train-dictionary' in options.args
+            count, before, after = mantis.cache.compress_entries(train_dictionary=train)
+            print(f'Rewrote {count} cache entries as {options.cache_compression}: {before} -> {after} bytes')
     elif options.action == 'reset':
         jira.warmup(delete_drafts=False)
     elif options.action == 'warmup-issues':
@@ -200,13 +250,13 @@ def main() -> None:
         converted = mantis.assistant.convert_text_format("# This is a header\n\nThis is a paragraph with **bold** text and *italic* text.", TextFormat.JIRA)
         print(converted)
     elif options.action == 'validate-draft':
-        data_ = jira.issues.get("ECS-1")
+        data_ = jira.issues.get_for_draft("ECS-1")
         data_.draft._validate_draft()
     elif options.action == 'update-draft':
-        data_ = jira.issues.get("ECS-1")
+        data_ = jira.issues.get_for_draft("ECS-1")
         data_.draft.content = 'Trolololo'
     elif options.action == 'make-verbose':
-        data_ = jira.issues.get("ECS-1")
+        data_ = jira.issues.get_for_draft("ECS-1")
         changes = data_.draft.make_verbose()
         pprint(changes)
     elif options.action == 'new':
@@ -219,10 +269,11 @@ def main() -> None:
         jira.web()
     elif options.action == 'get-field-names':
         for issue_key in options.args:
-            names = jira.get_field_names(issue_key)
-            pprint(names['names'])
+            pprint(jira.issues.get(issue_key).field_names)
     else:
         print(f'Action {options.action} not recognized')
+    if options.cache_stats:
+        print(mantis.cache.lru)
 
 if __name__ == '__main__':
     main()
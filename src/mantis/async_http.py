@@ -0,0 +1,101 @@
+import asyncio
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Self
+
+import httpx
+
+from mantis import json_codec
+from mantis.http import retry_delay, should_retry
+
+if TYPE_CHECKING:
+    from mantis.mantis_client import MantisClient
+
+
+class AsyncHttp:
+    """
+    Asyncio counterpart to Http, built on httpx.AsyncClient.
+
+    At most max_workers requests are in flight at once, sharing up to
+    pool_maxsize keep-alive connections. Retries, backoff and the token-bucket
+    limiter behave as in Http, and the limiter is shared with it.
+    """
+
+    def __init__(self, mantis: 'MantisClient', transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self.mantis = mantis
+        self.options = mantis.options
+        self.limiter = mantis.http.limiter
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    @property
+    def api_url(self) -> str:
+        assert self.options.url
+        return self.options.url + "/rest/api/latest"
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client, created on first use with auth and headers prebuilt."""
+        if self._client is None:
+            auth = self.mantis.jira.auth
+            self._client = httpx.AsyncClient(
+                auth=(auth.user, auth.personal_access_token),
+                headers={"Content-Type": "application/json"},
+                verify=not auth.no_verify_ssl,
+                limits=httpx.Limits(
+                    max_connections=self.options.pool_maxsize,
+                    max_keepalive_connections=self.options.pool_maxsize,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so that it binds to the running event loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.options.max_workers)
+        return self._semaphore
+
+    async def aclose(self) -> None:
+        """Close the client and release all pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    async def _request(self, method: str, uri: str, **kwargs: Any) -> httpx.Response:
+        url = f"{self.api_url}/{uri}"
+        attempt = 0
+        async with self.semaphore:
+            while True:
+                wait = self.limiter.reserve()
+                if wait:
+                    await asyncio.sleep(wait)
+                response = await self.client.request(method, url, **kwargs)
+                retry_after = response.headers.get("Retry-After")
+                if not should_retry(method, response.status_code, retry_after) or attempt >= self.options.max_retries:
+                    return response
+                delay = retry_delay(retry_after, attempt, self.options.backoff_base, self.options.backoff_max)
+                print(f'{response.status_code} from {url}. Retrying in {delay:.1f}s')
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _get(self, uri: str, params: dict | None = None) -> httpx.Response:
+        return await self._request("GET", uri, params=params)
+
+    async def _post(self, uri: str, data: dict) -> httpx.Response:
+        return await self._request("POST", uri, content=json_codec.dumps(data))
+
+    async def _put(self, uri: str, data: dict) -> httpx.Response:
+        return await self._request("PUT", uri, content=json_codec.dumps(data))
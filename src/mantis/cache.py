@@ -1,8 +1,22 @@
-import json
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+import fnmatch
 import os
 from pathlib import Path
 import shutil
-from typing import TYPE_CHECKING, Any, Generator
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Generator, Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: the lock only guards threads of this process.
+    fcntl = None  # type: ignore[assignment]
+
+from mantis import json_codec
+from mantis.compression import Compressor
 
 if TYPE_CHECKING:
     from mantis.mantis_client import MantisClient
@@ -12,23 +26,190 @@ class CacheMissException(Exception):
     pass
 
 
+# Invalidation namespace -> (iter_dir identifier, filename prefix before the key or issuetype).
+INVALIDATION_NAMESPACES: dict[str, tuple[tuple[str, str], ...]] = {
+    "issues": (("issues", ""), ("issues_projected", "")),
+    "editmeta": (("editmeta", "editmeta_"), ("editmeta_schemas", "")),
+    "createmeta": (("createmeta", "createmeta_"), ("createmeta_schemas", "")),
+    "system": (("system", ""),),
+    "completions": (("completions", ""),),
+}
+
+
+class LruCache:
+    """Bounded in-memory map from cache file to its parsed contents.
+
+    Each entry is stored with the (mtime, size) of the file it was parsed from,
+    and is only served while the file still has that stamp. The returned objects
+    are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Path, tuple[tuple[int, int], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __str__(self) -> str:
+        lookups = self.hits + self.misses
+        rate = f'{self.hits / lookups:.0%}' if lookups else 'n/a'
+        return f'Cache reads: {self.hits} hits, {self.misses} misses (hit rate: {rate}), {len(self)} entries in memory'
+
+    def get(self, file: Path, stamp: tuple[int, int]) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(file)
+            if entry is None or entry[0] != stamp:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(file)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, file: Path, stamp: tuple[int, int], value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[file] = (stamp, value)
+            self._entries.move_to_end(file)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, file: Path) -> None:
+        with self._lock:
+            self._entries.pop(file, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _current_umask() -> int:
+    # os.umask can only be read by setting it, so this is done once, before any threads start.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Mode of new cache entries, as open() would create them. Temporary files are created 0600.
+NEW_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def _fsync(path: Path) -> None:
+    """Flush a file, or the entries of a directory, to disk."""
+    if path.is_dir() and os.name != "posix":
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CacheLock:
+    """Exclusive lock on the cache, shared by threads and by other mantis processes.
+
+    Reentrant within a thread. Other processes are excluded with flock on a lock
+    file in the cache root, which is never removed.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: int | None = None
+
+    def __enter__(self) -> None:
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._depth += 1
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+
 class Cache:
+    """Local copy of Jira data, one JSON file per entry.
+
+    Issues, editmeta, createmeta, issuetypes and projects expire after the TTL
+    configured for their namespace. An expired entry is treated as a miss, or
+    with stale-while-revalidate, served as is while the refresher registered
+    for its namespace fetches it again in the background.
+
+    Entries are written to a temporary file and renamed into place, so readers
+    never see partial JSON. Read-modify-write of shared files and invalidation
+    hold the cache lock, which also excludes other mantis processes.
+
+    Entries can be stored gzip or zstd compressed (see Compressor). Filenames
+    stay the same, and the format is detected on read.
+
+    Issues are sharded by project and issue number (see issue_file), so that no
+    directory grows past a few hundred entries. Caches in the older flat layout
+    are migrated when opened.
+    """
+
+    lock_name = ".lock"
+    dictionaries_name = "zstd-dictionaries"
+    shard_issues = True
+
     def __init__(self, mantis: 'MantisClient') -> None:
         self.mantis = mantis
+        self.lru = LruCache(mantis.options.cache_lru_size)
+        self.compressor = Compressor(
+            mantis.options.cache_compression,
+            mantis.options.cache_compression_level,
+            self.root / self.dictionaries_name,
+        )
+        # Guards read-modify-write of files shared by concurrent fetches and processes.
+        self.lock = CacheLock(self.root / self.lock_name)
+        # Files written inside batch() are fsynced together when the outermost batch ends.
+        self._sync_lock = threading.Lock()
+        self._sync_depth = 0
+        self._unsynced: set[Path] = set()
+        # Namespace -> callable that fetches the entry at the given path from upstream.
+        self.refreshers: dict[str, Callable[[Path], Any]] = {}
+        self._refreshing: set[Path] = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor: ThreadPoolExecutor | None = None
         self.root.mkdir(exist_ok=True)
         self.issues.mkdir(exist_ok=True)
+        self.projected_issues.mkdir(exist_ok=True)
         self.system.mkdir(exist_ok=True)
         self.createmeta.mkdir(exist_ok=True)
         self.createmeta_schemas.mkdir(exist_ok=True)
         self.editmeta.mkdir(exist_ok=True)
         self.editmeta_schemas.mkdir(exist_ok=True)
+        if self.shard_issues:
+            self.migrate_issue_layout()
 
     def invalidate(self) -> None:
-        if self.root.exists():
-            # This violently removes everything. Don't store anything important in the cache.
-            shutil.rmtree(self.root)
+        self.lru.clear()
         self.root.mkdir(exist_ok=True)
+        with self.lock:
+            # This violently removes everything. Don't store anything important in the cache.
+            for entry in self.root.iterdir():
+                # Dictionaries are kept for entries written by concurrent processes.
+                if entry.name in (self.lock_name, self.dictionaries_name):
+                    continue
+                if entry.is_dir():
+                    shutil.rmtree(entry)
+                else:
+                    os.remove(entry)
         self.issues.mkdir(exist_ok=True)
+        self.projected_issues.mkdir(exist_ok=True)
         self.system.mkdir(exist_ok=True)
         self.createmeta.mkdir(exist_ok=True)
         self.createmeta_schemas.mkdir(exist_ok=True)
@@ -43,6 +224,53 @@ class Cache:
     def issues(self) -> Path:
         return self.root / "issues"
 
+    @property
+    def projected_issues(self) -> Path:
+        """Issues fetched with only a subset of their fields (see JiraIssues.get_for_draft)."""
+        return self.root / "issues_projected"
+
+    def issue_file(self, key: str, projected: bool = False) -> Path:
+        """Path of the entry for an issue, e.g. issues/ECS/45/ECS-12345.json.
+
+        Issues are bucketed by project and the last two digits of their number.
+        """
+        directory = self.projected_issues if projected else self.issues
+        if not self.shard_issues:
+            return directory / f"{key}.json"
+        project, _, number = key.rpartition("-")
+        bucket = f"{int(number) % 100:02d}" if number.isdigit() else "_"
+        return directory / (project or "_") / bucket / f"{key}.json"
+
+    def _get_issue_file(self, key: str, projected: bool = False) -> Any | None:
+        file = self.issue_file(key, projected)
+        data = self._get(file.parent, file.name)
+        if data is None and self.shard_issues:
+            # Written in the flat layout after this cache was opened, e.g. by an older mantis.
+            flat = file.parents[2] / file.name
+            if flat.is_file():
+                self._move(flat, file)
+                data = self._get(file.parent, file.name)
+        return data
+
+    def _move(self, source: Path, target: Path) -> None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(source, target)
+        except FileNotFoundError:
+            # Moved by a concurrent process.
+            pass
+
+    def migrate_issue_layout(self) -> int:
+        """Move issues of the flat layout (issues/ECS-1.json) into their shards. Returns how many were moved."""
+        moved = 0
+        for directory, projected in ((self.issues, False), (self.projected_issues, True)):
+            with os.scandir(directory) as entries:
+                flat = [entry.name for entry in entries if entry.is_file() and entry.name.endswith(".json")]
+            for name in flat:
+                self._move(directory / name, self.issue_file(name.removesuffix(".json"), projected))
+                moved += 1
+        return moved
+
     @property
     def system(self) -> Path:
         return self.root / "system"
@@ -63,18 +291,128 @@ class Cache:
     def editmeta(self) -> Path:
         return self.system / "editmeta"
 
+    @property
+    def completions(self) -> Path:
+        """Assistant completions, by hash of their request (see OpenAIClient.get_completion)."""
+        return self.root / "completions"
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group many writes together.
+
+        Each file is still replaced immediately. With the fsync option, the files
+        and their directories are flushed to disk together at the end of the batch.
+        """
+        with self._sync_lock:
+            self._sync_depth += 1
+        try:
+            yield
+        finally:
+            with self._sync_lock:
+                self._sync_depth -= 1
+                files = set()
+                if self._sync_depth == 0:
+                    files, self._unsynced = self._unsynced, set()
+            for file in files:
+                _fsync(file)
+            for directory in {file.parent for file in files}:
+                _fsync(directory)
+
+    def read_bytes(self, file: Path) -> bytes | None:
+        """Read the uncompressed contents of a cache entry, regardless of _no_read_cache."""
+        try:
+            with open(file, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        return self.compressor.decompress(raw)
+
+    def read(self, file: Path) -> str | None:
+        """Read the raw contents of a cache entry, regardless of _no_read_cache."""
+        contents = self.read_bytes(file)
+        return None if contents is None else contents.decode()
+
     def _get(self, path: Path, filename: str) -> dict | None:
         if self.mantis._no_read_cache:
             raise LookupError('Attempted to access cache when _no_read_cache is set')
-        if not (path / filename).exists():
+        file = path / filename
+        try:
+            stat = os.stat(file)
+        except FileNotFoundError:
+            self.lru.discard(file)
             return None
-        with open(path / filename, "r") as f:
-            return json.load(f)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        data = self.lru.get(file, stamp)
+        if data is None:
+            contents = self.read_bytes(file)
+            if contents is None:
+                return None
+            data = json_codec.loads(contents)
+            self.lru.put(file, stamp, data)
+        return self._check_freshness(file, stat.st_mtime, data)
+
+    def _namespace(self, file: Path) -> str | None:
+        """The TTL namespace of a cache entry, if it has one."""
+        if file.is_relative_to(self.issues) or file.is_relative_to(self.projected_issues):
+            return "issues"
+        if file.parent == self.editmeta:
+            return "editmeta"
+        if file.parent == self.createmeta:
+            return "createmeta"
+        if file.parent == self.system and file.stem in ("issuetypes", "projects"):
+            return file.stem
+        return None
+
+    def _check_freshness(self, file: Path, modified: float, data: Any) -> Any | None:
+        namespace = self._namespace(file)
+        if namespace is None:
+            return data
+        ttl = self.mantis.options.cache_ttl(namespace)
+        if not ttl or time.time() - modified < ttl:
+            return data
+        refresh = self.refreshers.get(namespace)
+        if refresh is None or not self.mantis.options.stale_while_revalidate:
+            return None
+        self._schedule_refresh(file, refresh)
+        return data
+
+    def _schedule_refresh(self, file: Path, refresh: Callable[[Path], Any]) -> None:
+        with self._refresh_lock:
+            if file in self._refreshing:
+                return
+            self._refreshing.add(file)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+            future = self._refresh_executor.submit(refresh, file)
+
+        def done(future: Future) -> None:
+            with self._refresh_lock:
+                self._refreshing.discard(file)
+            if future.exception():
+                print(f'Background refresh of {file.name} failed: {future.exception()}')
+
+        future.add_done_callback(done)
+
+    def wait_for_refreshes(self) -> None:
+        """Block until all background refreshes have finished."""
+        with self._refresh_lock:
+            executor, self._refresh_executor = self._refresh_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
 
     def get_issue(self, key: str) -> dict | None:
         if self.mantis._no_read_cache:
             raise LookupError('Attempted to access cache when _no_read_cache is set')
-        return self._get(self.issues, f"{key}.json")
+        return self._get_issue_file(key)
+
+    def get_projected_issue(self, key: str, fields: list[str]) -> dict | None:
+        """A projected issue, if it was fetched with at least the given fields."""
+        if self.mantis._no_read_cache:
+            raise LookupError('Attempted to access cache when _no_read_cache is set')
+        entry = self._get_issue_file(key, projected=True)
+        if not entry or not set(fields) <= set(entry['projection']):
+            return None
+        return entry['issue']
 
     def get_from_system_cache(self, filename: str) -> dict[str, Any] | list[dict[str, Any]] | None:
         if self.mantis._no_read_cache:
@@ -99,6 +437,30 @@ class Cache:
         assert isinstance(issuetypes, dict), f'{issuetypes} should be of type dict. Got: {type(issuetypes)}: {issuetypes}'
         return issuetypes
 
+    def get_sync_watermark(self, jql: str) -> str | None:
+        watermarks = self.get_from_system_cache("sync.json") or {}
+        assert isinstance(watermarks, dict), f'Expected sync watermarks to be dict. Got: {type(watermarks)}: {watermarks}'
+        return watermarks.get(jql)
+
+    def get_field_names(self) -> dict[str, str]:
+        names = self.get_from_system_cache("field_names.json") or {}
+        assert isinstance(names, dict), f'Expected field names to be dict. Got: {type(names)}: {names}'
+        return names
+
+    def _relative(self, file: Path) -> str:
+        return file.relative_to(self.root).as_posix()
+
+    def _validators_key(self, file: Path) -> str:
+        return self._relative(file)
+
+    def get_validators(self, file: Path) -> dict[str, Any]:
+        """The ETag/Last-Modified validators stored for a cache entry, and when it was last checked."""
+        # Read directly, since entries are revalidated exactly when _no_read_cache is set.
+        contents = self.read_bytes(self.system / "validators.json")
+        validators = json_codec.loads(contents) if contents else {}
+        assert isinstance(validators, dict), f'Expected validators to be dict. Got: {type(validators)}: {validators}'
+        return validators.get(self._validators_key(file), {})
+
     def get_createmeta_from_cache(self, issuetype_name: str) -> dict[str, Any] | None:
         filename = f"createmeta_{issuetype_name.lower()}.json"
         contents = self._get(self.createmeta, filename)
@@ -115,48 +477,292 @@ class Cache:
         assert isinstance(contents, dict), f'Expected editmeta to be dict. Got: {type(contents)}: {contents}'
         return contents
 
-    def _write(self, path: Path, filename: str, contents: str) -> int:
-        with open(path / filename, "w") as f:
-            return f.write(contents)
+    def _write(self, path: Path, filename: str, contents: str | bytes) -> int:
+        file = path / filename
+        self.lru.discard(file)
+        fsync = self.mantis.options.cache_fsync
+        with self._sync_lock:
+            batched = fsync and self._sync_depth > 0
+            if batched:
+                self._unsynced.add(file)
+        try:
+            fd, tmp = tempfile.mkstemp(dir=path, prefix=f".{filename}.", suffix=".tmp")
+        except FileNotFoundError:
+            # The directory was removed by a concurrent invalidate.
+            path.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path, prefix=f".{filename}.", suffix=".tmp")
+        data = self.compressor.compress(contents)
+        try:
+            # Keep the mode of the entry being replaced, so caches shared between users stay readable.
+            try:
+                mode = os.stat(file).st_mode & 0o777
+            except FileNotFoundError:
+                mode = NEW_FILE_MODE
+            os.chmod(tmp, mode)
+            with open(fd, "wb") as f:
+                written = f.write(data)
+                if fsync and not batched:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, file)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        if fsync and not batched:
+            _fsync(path)
+        return written
+
+    def write(self, file: Path, contents: str | bytes) -> int:
+        """Write the raw contents of a cache entry."""
+        return self._write(file.parent, file.name, contents)
 
     def write_issue(self, key: str, data: dict) -> int:
-        return self._write(self.issues, f"{key}.json", json.dumps(data))
+        # The full issue supersedes any older projection of it.
+        self.remove(self._relative(self.issue_file(key, projected=True)))
+        file = self.issue_file(key)
+        return self._write(file.parent, file.name, json_codec.dumps(data))
+
+    def write_projected_issue(self, key: str, fields: list[str], data: dict) -> int:
+        # A fresher projection makes the full issue stale.
+        self.remove(self._relative(self.issue_file(key)))
+        entry = {'projection': sorted(fields), 'issue': data}
+        file = self.issue_file(key, projected=True)
+        return self._write(file.parent, file.name, json_codec.dumps(entry))
 
-    def write_to_system_cache(self, filename: str, issue_enums: str) -> None:
+    def write_to_system_cache(self, filename: str, issue_enums: str | bytes) -> None:
         self._write(self.system, filename, issue_enums)
 
     def write_issuetypes_to_system_cache(self, issuetypes: dict[str, Any]) -> None:
-        self.write_to_system_cache("issuetypes.json", json.dumps(issuetypes))
+        self.write_to_system_cache("issuetypes.json", json_codec.dumps(issuetypes))
+
+    def write_sync_watermark(self, jql: str, watermark: str) -> None:
+        with self.lock:
+            # Read directly, since other watermarks must be kept even when _no_read_cache is set.
+            contents = self.read_bytes(self.system / "sync.json")
+            watermarks = json_codec.loads(contents) if contents else {}
+            assert isinstance(watermarks, dict), f'Expected sync watermarks to be dict. Got: {type(watermarks)}: {watermarks}'
+            watermarks[jql] = watermark
+            self.write_to_system_cache("sync.json", json_codec.dumps(watermarks))
+
+    def get_completion(self, key: str) -> str | None:
+        """A cached completion, regardless of _no_read_cache. Marks it as recently used."""
+        file = self.completions / f"{key}.json"
+        contents = self.read_bytes(file)
+        if contents is None:
+            return None
+        self._touch(file)
+        response = json_codec.loads(contents).get('response')
+        assert isinstance(response, str), f'Expected completion to be str. Got: {type(response)}: {response}'
+        return response
+
+    def write_completion(self, key: str, model: str, response: str, max_bytes: int) -> None:
+        """Cache a completion, then evict the least recently used ones beyond max_bytes."""
+        self._write(self.completions, f"{key}.json", json_codec.dumps({'model': model, 'response': response}))
+        self.evict_completions(max_bytes)
+
+    def evict_completions(self, max_bytes: int) -> int:
+        """Remove the least recently used completions until they take at most max_bytes. Returns how many were removed."""
+        with self.lock:
+            entries = sorted(
+                (self._modified(file) or 0.0, self._size(file), file) for file in self.iter_dir("completions")
+            )
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, file in entries:
+                if total <= max_bytes:
+                    break
+                if self.remove(self._relative(file)):
+                    removed += 1
+                total -= size
+        return removed
+
+    def update_field_names(self, names: dict[str, str]) -> None:
+        """Merge field id to display name mappings into the shared field names file."""
+        with self.lock:
+            # Read directly, since the existing names must be kept even when _no_read_cache is set.
+            contents = self.read_bytes(self.system / "field_names.json")
+            merged = json_codec.loads(contents) if contents else {}
+            assert isinstance(merged, dict), f'Expected field names to be dict. Got: {type(merged)}: {merged}'
+            if names.items() <= merged.items():
+                return
+            merged.update(names)
+            self.write_to_system_cache("field_names.json", json_codec.dumps(merged))
+
+    def write_validators(self, file: Path, validators: dict[str, Any]) -> None:
+        with self.lock:
+            contents = self.read_bytes(self.system / "validators.json")
+            merged = json_codec.loads(contents) if contents else {}
+            assert isinstance(merged, dict), f'Expected validators to be dict. Got: {type(merged)}: {merged}'
+            merged[self._validators_key(file)] = validators
+            self.write_to_system_cache("validators.json", json_codec.dumps(merged))
 
     def write_createmeta(self, issuetype_name: str, createmeta: dict[str, int | list[dict[str, Any]]]) -> None:
         filename = f"createmeta_{issuetype_name.lower()}.json"
-        self._write(self.createmeta, filename, json.dumps(createmeta))
+        self._write(self.createmeta, filename, json_codec.dumps(createmeta))
 
     def write_editmeta(self, issue_key: str, editmeta: dict[str, Any]) -> None:
         filename = f"editmeta_{issue_key.lower()}.json"
-        self._write(self.editmeta, filename, json.dumps(editmeta))
+        self._write(self.editmeta, filename, json_codec.dumps(editmeta))
 
     def write_createmeta_schema(self, issuetype_name: str, createmeta: dict[str, int | list[dict[str, Any]]]) -> None:
         filename = f"{issuetype_name.lower()}.json"
-        self._write(self.createmeta_schemas, filename, json.dumps(createmeta))
+        self._write(self.createmeta_schemas, filename, json_codec.dumps(createmeta))
 
     def write_editmeta_schema(self, issue_key: str, editmeta: dict[str, Any]) -> None:
         filename = f"{issue_key.lower()}.json"
-        self._write(self.editmeta_schemas, filename, json.dumps(editmeta))
+        self._write(self.editmeta_schemas, filename, json_codec.dumps(editmeta))
 
     def remove(self, filename: str) -> bool:
+        self.lru.discard(self.root / filename)
         if not (self.root / filename).exists():
             return False
         os.remove(self.root / filename)
         return True
 
     def remove_issue(self, key: str) -> bool:
-        return self.remove(f"issues/{key}.json")
+        return self.remove(self._relative(self.issue_file(key)))
+
+    def _dirs(self) -> dict[str, Path]:
+        return {
+            "createmeta": self.createmeta,
+            "createmeta_schemas": self.createmeta_schemas,
+            "editmeta": self.editmeta,
+            "editmeta_schemas": self.editmeta_schemas,
+            "issues": self.issues,
+            "issues_projected": self.projected_issues,
+            "system": self.system,
+            "completions": self.completions,
+        }
+
+    def _dir_for(self, identifier: str) -> Path | None:
+        return self._dirs().get(identifier)
 
     def iter_dir(self, identifier: str) -> Generator[Path, None, None]:
-        if identifier == "createmeta":
-            for file in self.createmeta.iterdir():
-                yield file
-        if identifier == "issues":
-            for file in self.issues.iterdir():
-                yield file
+        """Yield the entries of a directory. Issue shards are walked lazily, one directory at a time."""
+        path = self._dir_for(identifier)
+        if path is None:
+            return
+        sharded = self.shard_issues and identifier in ("issues", "issues_projected")
+        yield from self._scan(path, depth=2 if sharded else 0)
+
+    def _scan(self, path: Path, depth: int) -> Generator[Path, None, None]:
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    # Skip temporary files of writes in progress.
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_file():
+                        yield path / entry.name
+                    elif depth and entry.is_dir():
+                        yield from self._scan(path / entry.name, depth - 1)
+        except FileNotFoundError:
+            # Removed by a concurrent invalidate.
+            return
+
+    def _modified(self, file: Path) -> float | None:
+        try:
+            return os.stat(file).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _size(self, file: Path) -> int:
+        try:
+            return os.stat(file).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _touch(self, file: Path) -> None:
+        try:
+            os.utime(file)
+        except FileNotFoundError:
+            # Evicted by a concurrent process.
+            pass
+
+    def _issuetype_of(self, file: Path) -> str | None:
+        contents = self.read_bytes(file)
+        if contents is None:
+            return None
+        data = json_codec.loads(contents)
+        if file.is_relative_to(self.projected_issues):
+            data = data['issue']
+        return data.get('fields', {}).get('issuetype', {}).get('name')
+
+    def invalidate_entries(
+        self,
+        namespaces: Iterable[str] | None = None,
+        issuetype: str | None = None,
+        keys: str | None = None,
+        older_than: float | None = None,
+    ) -> int:
+        """Remove the cache entries matching all of the given filters. Returns how many were removed.
+
+        namespaces: any of INVALIDATION_NAMESPACES. Defaults to all of them.
+        issuetype: the createmeta of that issuetype, and the issues of that type with their editmeta.
+        keys: a glob on issue keys (e.g. "ECS-1*"), matching issues and their editmeta.
+        older_than: only entries written more than this many seconds ago.
+        """
+        selected = set(namespaces or INVALIDATION_NAMESPACES)
+        unknown = selected - set(INVALIDATION_NAMESPACES)
+        if unknown:
+            raise ValueError(f'Unknown cache namespaces: {sorted(unknown)}. Choose from: {INVALIDATION_NAMESPACES}')
+        keys_of_issuetype: set[str] = set()
+        if issuetype:
+            for identifier in ("issues", "issues_projected"):
+                for file in self.iter_dir(identifier):
+                    if (self._issuetype_of(file) or '').lower() == issuetype.lower():
+                        keys_of_issuetype.add(file.stem.lower())
+
+        def matches(namespace: str, name: str) -> bool:
+            if namespace in ("issues", "editmeta"):
+                return (
+                    (not issuetype or name.lower() in keys_of_issuetype)
+                    and (not keys or fnmatch.fnmatch(name.lower(), keys.lower()))
+                )
+            if namespace == "createmeta":
+                return not keys and (not issuetype or name.lower() == issuetype.lower())
+            # System metadata is not specific to any issuetype or key.
+            return not (issuetype or keys)
+
+        now = time.time()
+        removed = 0
+        with self.batch():
+            for namespace in sorted(selected):
+                for identifier, prefix in INVALIDATION_NAMESPACES[namespace]:
+                    for file in list(self.iter_dir(identifier)):
+                        if not matches(namespace, file.stem.removeprefix(prefix)):
+                            continue
+                        if older_than is not None:
+                            modified = self._modified(file)
+                            if modified is not None and now - modified <= older_than:
+                                continue
+                        if self.remove(self._relative(file)):
+                            removed += 1
+        return removed
+
+    def compress_entries(self, train_dictionary: bool = False) -> tuple[int, int, int]:
+        """Rewrite every entry in the configured compression format, keeping their write times.
+
+        With train_dictionary, a zstd dictionary is first trained on the cached
+        issues and editmeta. Returns the number of entries, and their total size
+        in bytes before and after.
+        """
+        files = [file for identifier in self._dirs() for file in self.iter_dir(identifier)]
+        if train_dictionary:
+            samples = []
+            for file in files:
+                contents = self.read_bytes(file)
+                if contents and (file.is_relative_to(self.issues) or file.parent == self.editmeta):
+                    samples.append(contents)
+            self.compressor.train_dictionary(samples)
+        before = after = 0
+        with self.lock, self.batch():
+            for file in files:
+                stat = os.stat(file)
+                contents = self.read_bytes(file)
+                if contents is None:
+                    continue
+                before += stat.st_size
+                after += self._write(file.parent, file.name, contents)
+                os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        return len(files), before, after
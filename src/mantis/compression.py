@@ -0,0 +1,95 @@
+import gzip
+import threading
+from pathlib import Path
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:  # Optional: pip install zstandard
+    zstandard = None  # type: ignore[assignment]
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+
+class Compressor:
+    """Encodes cache entries in the configured format and decodes any supported format.
+
+    The format of an entry is detected from its leading bytes, so entries written
+    with a different compression setting (or none) stay readable.
+
+    With zstd, new entries use the most recently trained dictionary, if any.
+    Dictionaries are stored by id in dictionary_dir and never overwritten, and
+    every frame records the id of its dictionary, so older entries still decode
+    after retraining.
+    """
+
+    def __init__(self, method: str, level: int | None, dictionary_dir: Path) -> None:
+        if method not in COMPRESSIONS:
+            raise ValueError(f'Cache compression must be one of {COMPRESSIONS}. Got: {method}')
+        if method == "zstd" and zstandard is None:
+            raise ValueError('Cache compression "zstd" requires the zstandard package (pip install zstandard)')
+        self.method = method
+        self.level = level
+        self.dictionary_dir = dictionary_dir
+        self._compressor: zstandard.ZstdCompressor | None = None
+        self._decompressors: dict[int, zstandard.ZstdDecompressor] = {}
+        # zstd (de)compressor objects must not be used by several threads at once.
+        self._lock = threading.Lock()
+
+    @property
+    def current_dictionary_file(self) -> Path:
+        return self.dictionary_dir / "current"
+
+    def _dictionary(self, dict_id: int) -> 'zstandard.ZstdCompressionDict':
+        return zstandard.ZstdCompressionDict((self.dictionary_dir / f"{dict_id}.dict").read_bytes())
+
+    def _zstd_compressor(self) -> 'zstandard.ZstdCompressor':
+        if self._compressor is None:
+            try:
+                dictionary = self._dictionary(int(self.current_dictionary_file.read_text()))
+            except FileNotFoundError:
+                dictionary = None
+            self._compressor = zstandard.ZstdCompressor(level=3 if self.level is None else self.level, dict_data=dictionary)
+        return self._compressor
+
+    def _zstd_decompressor(self, raw: bytes) -> 'zstandard.ZstdDecompressor':
+        if zstandard is None:
+            raise ValueError('Found a zstd compressed cache entry, but the zstandard package is not installed')
+        dict_id = zstandard.get_frame_parameters(raw).dict_id
+        if dict_id not in self._decompressors:
+            dictionary = self._dictionary(dict_id) if dict_id else None
+            self._decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return self._decompressors[dict_id]
+
+    def compress(self, contents: str | bytes) -> bytes:
+        data = contents.encode() if isinstance(contents, str) else contents
+        if self.method == "gzip":
+            # mtime=0 keeps the output identical for identical entries.
+            return gzip.compress(data, compresslevel=6 if self.level is None else self.level, mtime=0)
+        if self.method == "zstd":
+            with self._lock:
+                return self._zstd_compressor().compress(data)
+        return data
+
+    def decompress(self, raw: bytes) -> bytes:
+        if raw.startswith(GZIP_MAGIC):
+            return gzip.decompress(raw)
+        if raw.startswith(ZSTD_MAGIC):
+            with self._lock:
+                return self._zstd_decompressor(raw).decompress(raw)
+        return raw
+
+    def train_dictionary(self, samples: list[bytes], size: int = 112640) -> int:
+        """Train a zstd dictionary on uncompressed samples and use it for new entries. Returns its id."""
+        if zstandard is None:
+            raise ValueError('Training a dictionary requires the zstandard package (pip install zstandard)')
+        dictionary = zstandard.train_dictionary(size, samples)
+        dict_id = dictionary.dict_id()
+        self.dictionary_dir.mkdir(exist_ok=True)
+        (self.dictionary_dir / f"{dict_id}.dict").write_bytes(dictionary.as_bytes())
+        self.current_dictionary_file.write_text(str(dict_id))
+        with self._lock:
+            self._compressor = None
+        return dict_id
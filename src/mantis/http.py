@@ -1,43 +1,178 @@
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from typing import TYPE_CHECKING, Any
 
+from mantis import json_codec
+
 if TYPE_CHECKING:
-    from requests.auth import HTTPBasicAuth
     from mantis.mantis_client import MantisClient
 
+
+# Responses Jira sends when it is overloaded or rate limiting. Worth retrying.
+RETRY_STATUSES = (429, 502, 503, 504)
+# Methods that may be repeated with the same effect, and so are retried on any of RETRY_STATUSES.
+IDEMPOTENT_METHODS = ("get", "head", "options", "delete")
+
+
+def should_retry(method: str, status_code: int, retry_after: str | None) -> bool:
+    """Whether a response is worth retrying.
+
+    A 502 or 504 from a gateway may come after Jira handled the request, so
+    POST and PUT (e.g. creating an issue) are only retried when Jira turned the
+    request away: on 429, or on 503 with Retry-After.
+    """
+    if status_code not in RETRY_STATUSES:
+        return False
+    if method.lower() in IDEMPOTENT_METHODS:
+        return True
+    return status_code == 429 or (status_code == 503 and bool(retry_after))
+
+
+class TokenBucket:
+    """Client-side rate limiter shared by all threads.
+
+    Allows bursts of up to `burst` requests, refilled at `rate` requests per
+    second. A rate of 0 disables the limiter.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            # A negative balance is the debt this caller waits off, in arrival order.
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self) -> None:
+        """Take a token, sleeping until one is available."""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+
+def retry_delay(retry_after: str | None, attempt: int, backoff_base: float, backoff_max: float) -> float:
+    """Seconds to wait before the next attempt.
+
+    Retry-After is given either in seconds or as an HTTP date. Without it, the
+    delay is drawn uniformly up to an exponentially growing cap.
+    """
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                pass
+            else:
+                return max((retry_at - datetime.now(UTC)).total_seconds(), 0.0)
+    cap = min(backoff_max, backoff_base * 2 ** attempt)
+    return random.uniform(0, cap)
+
+
 class Http:
     """
     A class to handle HTTP requests and responses.
+
+    All calls to the Jira API go through a single long-lived session, so that
+    TCP and TLS connections are pooled and kept alive between requests.
+    Requests pass a token-bucket limiter, and responses with a status in
+    RETRY_STATUSES are retried with exponential backoff and jitter, honouring
+    the Retry-After header when Jira sends one. POST and PUT are retried only
+    when Jira did not handle them (see should_retry).
     """
 
     def __init__(self, mantis: 'MantisClient', no_read_cache: bool = False) -> None:
         self.mantis = mantis
         self.options = mantis.options
+        self._session: requests.Session | None = None
+        self.limiter = TokenBucket(self.options.rate_limit, self.options.rate_limit_burst)
 
     @property
-    def requests_kwargs(self) -> dict[str, 'HTTPBasicAuth | bool | dict[str, Any]']:
-        return {
-            "auth": self.mantis.jira.auth.auth,
-            "headers": {"Content-Type": "application/json"},
-            "verify": (not self.mantis.jira.auth.no_verify_ssl),
-        }
+    def session(self) -> requests.Session:
+        """The shared session, created on first use with auth and headers prebuilt."""
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        # One pool per host, each keeping up to pool_maxsize connections alive.
+        adapter = HTTPAdapter(
+            pool_connections=self.options.pool_connections,
+            pool_maxsize=self.options.pool_maxsize,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.auth = self.mantis.jira.auth.auth
+        session.headers.update({"Content-Type": "application/json"})
+        session.verify = not self.mantis.jira.auth.no_verify_ssl
+        return session
+
+    def close(self) -> None:
+        """Close the session and release all pooled connections."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        return retry_delay(
+            response.headers.get("Retry-After"), attempt, self.options.backoff_base, self.options.backoff_max
+        )
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        send = getattr(self.session, method)
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            response: requests.Response = send(url, **kwargs)
+            retryable = should_retry(method, response.status_code, response.headers.get("Retry-After"))
+            if not retryable or attempt >= self.options.max_retries:
+                return response
+            delay = self._retry_delay(response, attempt)
+            print(f'{response.status_code} from {url}. Retrying in {delay:.1f}s')
+            time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def json(response: requests.Response) -> Any:
+        """Decode a response body with the shared JSON codec."""
+        return json_codec.loads(response.content)
 
     @property
     def api_url(self) -> str:
         assert self.options.url
         return self.options.url + "/rest/api/latest"
 
-    def _get(self, uri: str, params: dict = {}) -> requests.Response:
+    def _get(self, uri: str, params: dict = {}, headers: dict | None = None) -> requests.Response:
         """
         Perform a GET request to the specified URL with optional parameters.
 
         :param url: The URL to send the GET request to.
         :param params: Optional dictionary of query parameters.
+        :param headers: Optional headers added to the session headers.
         :return: The response text from the GET request.
         """
         url = f"{self.api_url}/{uri}"
-        return requests.get(url, params=params, **self.requests_kwargs)  # type: ignore
+        return self._request("get", url, params=params, headers=headers)
 
     @staticmethod
     def post(url: str, data: dict | None = None) -> str:
@@ -51,12 +186,12 @@ class Http:
         import requests
         response = requests.post(url, json=data)
         return response.text
-    
+
 
     def _post(self, uri: str, data: dict) -> requests.Response:
         url = f"{self.api_url}/{uri}"
-        return requests.post(url, json=data, **self.requests_kwargs)  # type: ignore
+        return self._request("post", url, data=json_codec.dumps(data))
 
     def _put(self, uri: str, data: dict) -> requests.Response:
         url = f"{self.api_url}/{uri}"
-        return requests.put(url, json=data, **self.requests_kwargs)  # type: ignore
+        return self._request("put", url, data=json_codec.dumps(data))
@@ -0,0 +1,45 @@
+"""JSON encoding and decoding shared by Cache, Http and AsyncHttp.
+
+orjson is used when it is installed (pip install orjson), and the stdlib json
+module otherwise. Both read what the other wrote. Encoded documents are bytes,
+ready to be compressed, written or sent.
+"""
+import json
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+try:
+    import orjson  # type: ignore[import-not-found]
+except ImportError:  # Optional: pip install orjson
+    orjson = None  # type: ignore[assignment]
+
+
+class JsonCodec(NamedTuple):
+    name: str
+    loads: Callable[[str | bytes], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode()
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    # Like the stdlib, accept int keys (e.g. in createmeta allowed values).
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+CODECS: dict[str, JsonCodec] = {"json": JsonCodec("json", json.loads, _stdlib_dumps)}
+if orjson is not None:
+    CODECS["orjson"] = JsonCodec("orjson", orjson.loads, _orjson_dumps)
+
+# The fastest installed codec.
+codec = CODECS.get("orjson", CODECS["json"])
+
+
+def loads(data: str | bytes) -> Any:
+    return codec.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    return codec.dumps(obj)
@@ -5,6 +5,7 @@ from mantis.http import Http
 from jira.jira_client import JiraClient
 from mantis.openai_client import OpenAIClient
 from mantis.options_loader import OptionsLoader
+from mantis.sqlite_cache import SqliteCache
 
 
 class MantisClient:
@@ -15,7 +16,7 @@ class MantisClient:
         self.cache_dir.mkdir(exist_ok=True)
         self.drafts_dir.mkdir(exist_ok=True)
         self.plugins_dir.mkdir(exist_ok=True)
-        self.cache = Cache(self)
+        self.cache = SqliteCache(self) if options.cache_backend == 'sqlite' else Cache(self)
         self.jira = JiraClient(self)
         self.http = Http(self, no_read_cache)
         self.assistant = Assistant(self)
@@ -1,3 +1,5 @@
+import hashlib
+import threading
 from typing import TYPE_CHECKING
 
 from openai import OpenAI
@@ -12,18 +14,40 @@ class OpenAIClient:
         self.mantis = mantis
         self.disabled = not self.mantis.options.chat_gpt_activated
         self.open_ai = OpenAI(base_url=self.mantis.options.chat_gpt_base_url, api_key=self.mantis.options.chat_gpt_api_key)
+        # Completions run on their own lane, so that bulk operations on many threads
+        # do not send more than this many requests at once.
+        self.lane = threading.BoundedSemaphore(self.mantis.options.chat_gpt_max_concurrency)
         
+    @staticmethod
+    def completion_key(input_text: str, prompt: str, model: str) -> str:
+        """Address of a completion in the cache: a hash of the model, prompt and input."""
+        digest = hashlib.sha256()
+        for part in (model, prompt, input_text):
+            digest.update(part.encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
+
     def get_completion(self, input_text: str, prompt: str, model: str = 'gpt-4.1') -> str:
+        """Complete the input with the prompt. Completions are cached in the cache dir, see completion-cache-mb."""
         if self.disabled:
             raise ConnectionError('OpenAI connectivity has not been configured')
-        completion = self.open_ai.chat.completions.create(
-                model="gpt-4.1",
-                messages=[
-                    {"role": "developer", "content": prompt},
-                    {"role": "user", "content": input_text}
-                ]
-            )
+        max_bytes = self.mantis.options.completion_cache_size
+        key = self.completion_key(input_text, prompt, model)
+        if max_bytes:
+            cached = self.mantis.cache.get_completion(key)
+            if cached is not None:
+                return cached
+        with self.lane:
+            completion = self.open_ai.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "developer", "content": prompt},
+                        {"role": "user", "content": input_text}
+                    ]
+                )
         response = completion.choices[0].message.content
         if not response:
             raise ValueError("Response is empty")
+        if max_bytes:
+            self.mantis.cache.write_completion(key, model, response, max_bytes)
         return response
@@ -1,4 +1,5 @@
 import argparse
+import os
 from pathlib import Path
 import tomllib
 
@@ -7,6 +8,15 @@ from xdg_base_dirs import xdg_config_home
 
 MANTIS_TOML = "mantis.toml"
 
+# Seconds a cache entry is served before it is refreshed, per namespace.
+DEFAULT_CACHE_TTLS = {
+    "issues": 5 * 60,
+    "editmeta": 60 * 60,
+    "createmeta": 24 * 60 * 60,
+    "issuetypes": 24 * 60 * 60,
+    "projects": 24 * 60 * 60,
+}
+
 
 class OptionsLoader:
     """Collects options from toml file, allowing for command line overrides"""
@@ -125,6 +135,21 @@ class OptionsLoader:
         else:
             self.options["jira"]["plugins-dir"] = value
 
+    @property
+    def defer_plugins(self) -> bool:
+        """Only generate meta model plugins during an explicit compile-plugins run."""
+        return bool(self.options.get("jira", {}).get("defer-plugins", False))
+
+    @property
+    def compile_workers(self) -> int:
+        """Number of processes used by compile-plugins. Defaults to the CPU count."""
+        return int(self.options.get("jira", {}).get("compile-workers", os.cpu_count() or 1))
+
+    @property
+    def draft_workers(self) -> int:
+        """Number of threads used by materialize-drafts. Defaults to max-workers under [http]."""
+        return int(self.options.get("jira", {}).get("draft-workers", self.max_workers))
+
     @property
     def type_id_cutoff(self) -> int:
         return int(
@@ -133,6 +158,93 @@ class OptionsLoader:
             or self.options.get("jira", {}).get("type-id-cutoff", 10100)
         )
 
+    @property
+    def cache_backend(self) -> str:
+        """Storage for the cache: "files" (one JSON file per entry) or "sqlite"."""
+        val = self.options.get("cache", {}).get("backend", "files")
+        if val not in ("files", "sqlite"):
+            raise ValueError(f'OptionsLoader.cache_backend must be "files" or "sqlite". Got: {val}')
+        return val
+
+    @property
+    def cache_lru_size(self) -> int:
+        """Number of parsed cache entries kept in memory. Set to 0 to disable."""
+        return int(self.options.get("cache", {}).get("lru-size", 256))
+
+    def cache_ttl(self, namespace: str) -> float:
+        """Seconds before entries in a cache namespace go stale. 0 keeps them forever."""
+        ttls = self.options.get("cache", {}).get("ttl", {})
+        return float(ttls.get(namespace, DEFAULT_CACHE_TTLS[namespace]))
+
+    @property
+    def stale_while_revalidate(self) -> bool:
+        """Serve stale cache entries immediately and refresh them in the background."""
+        return bool(self.options.get("cache", {}).get("stale-while-revalidate", True))
+
+    @property
+    def cache_compression(self) -> str:
+        """Format of newly written file cache entries: "none", "gzip" or "zstd" (requires zstandard)."""
+        return self.options.get("cache", {}).get("compression", "none")
+
+    @property
+    def cache_compression_level(self) -> int | None:
+        """Compression level, or None for the default of the format."""
+        val = self.options.get("cache", {}).get("compression-level")
+        return None if val is None else int(val)
+
+    @property
+    def cache_fsync(self) -> bool:
+        """Flush cache writes to disk, once per batch of writes, so they survive a crash of the machine."""
+        return bool(self.options.get("cache", {}).get("fsync", False))
+
+    @property
+    def draft_fields(self) -> list[str] | None:
+        """Jira fields fetched for drafts and diffs. None means the draft frontmatter fields and the description."""
+        return self.options.get("cache", {}).get("draft-fields")
+
+    @property
+    def cache_stats(self) -> bool:
+        return bool(self.parser and self.parser.cache_stats)
+
+    @property
+    def pool_connections(self) -> int:
+        """Number of per-host connection pools kept by the HTTP session."""
+        return int(self.options.get("http", {}).get("pool-connections", 4))
+
+    @property
+    def pool_maxsize(self) -> int:
+        """Number of keep-alive connections kept per host."""
+        return int(self.options.get("http", {}).get("pool-maxsize", 16))
+
+    @property
+    def max_workers(self) -> int:
+        """Number of concurrent requests used by bulk operations."""
+        return int(self.options.get("http", {}).get("max-workers", 8))
+
+    @property
+    def max_retries(self) -> int:
+        """Retries for requests answered with 429 or 5xx overload statuses."""
+        return int(self.options.get("http", {}).get("max-retries", 5))
+
+    @property
+    def backoff_base(self) -> float:
+        """Seconds of the first backoff, doubled on every retry."""
+        return float(self.options.get("http", {}).get("backoff-base", 0.5))
+
+    @property
+    def backoff_max(self) -> float:
+        """Upper bound in seconds for a single backoff."""
+        return float(self.options.get("http", {}).get("backoff-max", 30))
+
+    @property
+    def rate_limit(self) -> float:
+        """Requests per second allowed by the client-side limiter. Set to 0 to disable."""
+        return float(self.options.get("http", {}).get("rate-limit", 0))
+
+    @property
+    def rate_limit_burst(self) -> int:
+        """Requests allowed at once before the rate limit applies."""
+        return int(self.options.get("http", {}).get("rate-limit-burst", 10))
 
     @property
     def chat_gpt_base_url(self) -> str | None:
@@ -150,6 +262,21 @@ class OptionsLoader:
             or self.options.get("openai", {}).get("chat-gpt-api-key")
         )
 
+    @property
+    def chat_gpt_max_concurrency(self) -> int:
+        """Completions requested at once, however many threads ask for them."""
+        return int(self.options.get("openai", {}).get("max-concurrency", 2))
+
+    @property
+    def completion_cache_size(self) -> int:
+        """Bytes of completions kept in the cache dir, least recently used evicted first. Set to 0 to disable."""
+        return int(float(self.options.get("openai", {}).get("completion-cache-mb", 16)) * 1024 * 1024)
+
+    @property
+    def assistant_conversion(self) -> bool:
+        """Convert descriptions between Jira markup and markdown with the assistant, rather than locally."""
+        return bool(self.options.get("openai", {}).get("convert-with-assistant", False))
+
     @property
     def chat_gpt_activated(self) -> bool:
         return bool(
@@ -158,6 +285,19 @@ class OptionsLoader:
             else self.options.get("openai", {}).get("chat-gpt-activated", False)
         )
 
+    @property
+    def issuetype(self) -> str | None:
+        return self.parser and self.parser.issuetype or None
+
+    @property
+    def keys(self) -> str | None:
+        return self.parser and self.parser.keys or None
+
+    @property
+    def older_than(self) -> float | None:
+        val = self.parser and self.parser.older_than
+        return float(val) if val else None
+
     @property
     def action(self) -> str:
         return self.parser and self.parser.action or ""
@@ -241,6 +381,31 @@ def parse_args(args_overwrite: list[str] | None = None) -> argparse.Namespace:
         default=None,
         help="Activation of ChatGPT API",
     )
+    parser.add_argument(
+        "--cache-stats",
+        dest="cache_stats",
+        default=False,
+        action="store_true",
+        help="Print in-memory cache hit and miss counts when done",
+    )
+    parser.add_argument(
+        "--issuetype",
+        dest="issuetype",
+        default=None,
+        help="Limit invalidate-cache to one issuetype",
+    )
+    parser.add_argument(
+        "--keys",
+        dest="keys",
+        default=None,
+        help="Limit invalidate-cache to issue keys matching a glob (e.g. 'ECS-1*')",
+    )
+    parser.add_argument(
+        "--older-than",
+        dest="older_than",
+        default=None,
+        help="Limit invalidate-cache to entries older than this many seconds",
+    )
     parser.add_argument(
         "action",
         help="Action to perform (e.g. get-issue, create-issue, etc.)",
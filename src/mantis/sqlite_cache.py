@@ -0,0 +1,205 @@
+import sqlite3
+import threading
+import time
+from collections.abc import Generator, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from mantis import json_codec
+from mantis.cache import Cache
+
+if TYPE_CHECKING:
+    from mantis.mantis_client import MantisClient
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    directory TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    contents TEXT NOT NULL,
+    updated REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (directory, filename)
+)
+"""
+
+
+class SqliteCache(Cache):
+    """Cache backend storing every entry in a single SQLite file.
+
+    Entries are addressed by the same directory and filename as in the file
+    backend (e.g. "issues", "ECS-1.json"), so all public methods of Cache work
+    unchanged. The database runs in WAL mode. Writes inside a batch() are
+    committed together in a single transaction. There are no file stamps to
+    validate against, so reads bypass the in-memory LRU. Each row records when it
+    was written, which is what the namespace TTLs are checked against. Entries are
+    stored uncompressed and issues are not sharded; the compression and sharding
+    only apply to the files backend.
+    """
+
+    shard_issues = False
+
+    database_name = "cache.sqlite3"
+    # Seconds to wait for a write lock held by another connection.
+    busy_timeout = 30.0
+
+    def __init__(self, mantis: 'MantisClient') -> None:
+        super().__init__(mantis)
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        # Threads in JiraIssues.get_many share the connection, guarded by self._lock.
+        # Other mantis processes may hold the write lock, e.g. during a bulk sync.
+        self.connection = sqlite3.connect(
+            self.root / self.database_name, timeout=self.busy_timeout, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(SCHEMA)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(entries)")}
+        if "updated" not in columns:
+            # Databases created before entries expired. Their entries count as stale.
+            self.connection.execute("ALTER TABLE entries ADD COLUMN updated REAL NOT NULL DEFAULT 0")
+        self.connection.commit()
+
+    def _key(self, file: Path) -> tuple[str, str]:
+        return (file.parent.relative_to(self.root).as_posix(), file.name)
+
+    def _commit(self) -> None:
+        if self._batch_depth == 0:
+            self.connection.commit()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                self._commit()
+
+    def close(self) -> None:
+        self.wait_for_refreshes()
+        with self._lock:
+            self.connection.commit()
+            self.connection.close()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.connection.execute("DELETE FROM entries")
+            self._commit()
+
+    def read(self, file: Path) -> str | None:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT contents FROM entries WHERE directory = ? AND filename = ?", self._key(file)
+            ).fetchone()
+        return row[0] if row else None
+
+    def read_bytes(self, file: Path) -> bytes | None:
+        contents = self.read(file)
+        return None if contents is None else contents.encode()
+
+    def _get(self, path: Path, filename: str) -> dict | None:
+        if self.mantis._no_read_cache:
+            raise LookupError('Attempted to access cache when _no_read_cache is set')
+        file = path / filename
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT contents, updated FROM entries WHERE directory = ? AND filename = ?", self._key(file)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._check_freshness(file, row[1], json_codec.loads(row[0]))
+
+    def _modified(self, file: Path) -> float | None:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT updated FROM entries WHERE directory = ? AND filename = ?", self._key(file)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _size(self, file: Path) -> int:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT length(contents) FROM entries WHERE directory = ? AND filename = ?", self._key(file)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def _touch(self, file: Path) -> None:
+        with self._lock:
+            self.connection.execute(
+                "UPDATE entries SET updated = ? WHERE directory = ? AND filename = ?", (time.time(), *self._key(file))
+            )
+            self._commit()
+
+    def _write(self, path: Path, filename: str, contents: str | bytes, updated: float | None = None) -> int:
+        if isinstance(contents, bytes):
+            contents = contents.decode()
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries (directory, filename, contents, updated) VALUES (?, ?, ?, ?)",
+                (*self._key(path / filename), contents, time.time() if updated is None else updated),
+            )
+            self._commit()
+        return len(contents)
+
+    def remove(self, filename: str) -> bool:
+        with self._lock:
+            cursor = self.connection.execute(
+                "DELETE FROM entries WHERE directory = ? AND filename = ?", self._key(self.root / filename)
+            )
+            self._commit()
+        return cursor.rowcount > 0
+
+    def iter_dir(self, identifier: str) -> Generator[Path, None, None]:
+        path = self._dir_for(identifier)
+        if path is None:
+            return
+        directory = path.relative_to(self.root).as_posix()
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT filename FROM entries WHERE directory = ? ORDER BY filename", (directory,)
+            ).fetchall()
+        for (filename,) in rows:
+            yield path / filename
+
+    def import_directory_layout(self) -> int:
+        """Copy the entries of the one-file-per-entry layout into the database.
+
+        Only the entry directories are imported: issues and their projections,
+        editmeta, createmeta, system metadata and assistant completions. Entries
+        keep their write time, which for completions is when they were last used.
+        Compressed files are decoded on the way, as Cache.read_bytes does.
+
+        The ETag/Last-Modified validators (system/validators.json) are not an
+        entry. They are merged into the validators in the database, for the
+        imported entries only. Any other file in the cache directory is skipped.
+
+        Returns the number of imported entries. The files are left in place.
+        """
+        validators_file = self.system / "validators.json"
+        try:
+            with open(validators_file, "rb") as f:
+                file_validators = json_codec.loads(self.compressor.decompress(f.read()))
+        except FileNotFoundError:
+            file_validators = {}
+        imported = 0
+        with self.batch():
+            for identifier, directory in self._dirs().items():
+                sharded = identifier in ("issues", "issues_projected")
+                # Issues of the files backend are sharded in subdirectories. The
+                # other directories nest (system/createmeta), and are walked on their own.
+                for file in sorted(directory.rglob("*.json") if sharded else directory.glob("*.json")):
+                    # Hidden files are not entries
+                    if file.name.startswith(".") or file == validators_file:
+                        continue
+                    target = self.issue_file(file.stem, identifier == "issues_projected") if sharded else file
+                    with open(file, "rb") as f:
+                        contents = self.compressor.decompress(f.read())
+                    self._write(target.parent, target.name, contents, updated=file.stat().st_mtime)
+                    if self._relative(file) in file_validators:
+                        self.write_validators(target, file_validators[self._relative(file)])
+                    imported += 1
+        return imported
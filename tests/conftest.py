@@ -65,6 +65,10 @@ class Cli:
     chat_gpt_activated = False
     chat_gpt_base_url = "https://api.fakeai.com/v1"
     chat_gpt_api_key = "socks_off_full_throttle_$%^"
+    cache_stats = False
+    issuetype = None
+    keys = None
+    older_than = None
 
 
 @pytest.fixture
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import httpx
+import pytest
+
+from jira.async_jira_client import AsyncJiraClient
+from mantis.mantis_client import MantisClient
+from tests.data import CacheData
+
+
+class MockJira:
+    """Local HTTP server answering like Jira from a dict of path -> list of (status, payload)."""
+
+    def __init__(self) -> None:
+        self.routes: dict[str, list[tuple[int, object]]] = {}
+        self.requests: list[tuple[str, str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self) -> None:
+                with mock.lock:
+                    mock.requests.append((self.command, self.path))
+                    mock.in_flight += 1
+                    mock.max_in_flight = max(mock.max_in_flight, mock.in_flight)
+                    responses = mock.routes.get(urlparse(self.path).path, [(404, {})])
+                    status, payload = responses.pop(0) if len(responses) > 1 else responses[0]
+                time.sleep(0.05)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if status == 429:
+                    self.send_header('Retry-After', '0')
+                self.end_headers()
+                self.wfile.write(body)
+                with mock.lock:
+                    mock.in_flight -= 1
+
+            def do_GET(self) -> None:
+                self._respond()
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self._respond()
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def route(self, path: str, *responses: tuple[int, object]) -> None:
+        self.routes[f'/rest/api/latest/{path}'] = list(responses)
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def mock_jira(fake_mantis: MantisClient):
+    server = MockJira()
+    fake_mantis.options.parser.url = server.url  # type: ignore
+    yield server
+    server.close()
+
+
+class TestAsyncJiraClient:
+    def test_get_issues_runs_concurrently_and_keeps_order(self, fake_mantis: MantisClient, mock_jira: MockJira):
+        fake_mantis.options.options['http'] = {'max-workers': 3}
+        issues = [CacheData().ecs_1, CacheData().ecs_2, CacheData().ecs_3, CacheData().ecs_4, CacheData().ecs_5]
+        for issue in issues:
+            mock_jira.route(f"issue/{issue['key']}", (200, issue))
+
+        async def run() -> list[dict]:
+            async with AsyncJiraClient(fake_mantis) as jira:
+                return await jira.get_issues([issue['key'] for issue in issues], expand='editmeta,names')
+
+        fetched = asyncio.run(run())
+        assert [issue['key'] for issue in fetched] == ['ECS-1', 'ECS-2', 'ECS-3', 'ECS-4', 'ECS-5']
+        assert mock_jira.max_in_flight == 3
+        assert all('expand=editmeta%2Cnames' in path for _, path in mock_jira.requests)
+
+    def test_retries_and_post(self, fake_mantis: MantisClient, mock_jira: MockJira):
+        mock_jira.route('issue/createmeta/TEST/issuetypes', (429, {}), (200, CacheData().issuetypes))
+        mock_jira.route('issue', (201, {'key': 'TEST-7'}))
+
+        async def run() -> tuple[dict, dict]:
+            async with AsyncJiraClient(fake_mantis) as jira:
+                return await jira.get_issuetypes(), await jira.post_issue({'fields': {}})
+
+        issuetypes, created = asyncio.run(run())
+        assert issuetypes == CacheData().issuetypes
+        assert created == {'key': 'TEST-7'}
+        assert [method for method, _ in mock_jira.requests] == ['GET', 'GET', 'POST']
+
+    def test_post_is_not_retried_after_gateway_errors(self, fake_mantis: MantisClient, mock_jira: MockJira):
+        mock_jira.route('issue', (504, {}), (201, {'key': 'TEST-7'}))
+
+        async def run() -> dict:
+            async with AsyncJiraClient(fake_mantis) as jira:
+                return await jira.post_issue({'fields': {}})
+
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(run())
+        assert [method for method, _ in mock_jira.requests] == ['POST']
+
+    def test_errors_raise(self, fake_mantis: MantisClient, mock_jira: MockJira):
+        async def run() -> dict:
+            async with AsyncJiraClient(fake_mantis) as jira:
+                return await jira.get_editmeta('TEST-999')
+
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(run())
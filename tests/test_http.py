@@ -0,0 +1,101 @@
+from unittest.mock import patch
+
+from requests.auth import HTTPBasicAuth
+
+from mantis.http import TokenBucket
+from mantis.mantis_client import MantisClient
+
+
+class TestHttp:
+    def test_session_is_reused(self, fake_mantis: MantisClient):
+        session = fake_mantis.http.session
+        assert fake_mantis.http.session is session
+
+    def test_session_has_prebuilt_auth_and_headers(self, fake_mantis: MantisClient):
+        session = fake_mantis.http.session
+        assert isinstance(session.auth, HTTPBasicAuth)
+        assert session.auth.username == "user_1@domain.com"
+        assert session.headers["Content-Type"] == "application/json"
+        assert session.verify is True
+
+    def test_session_pool_is_configurable(self, fake_mantis: MantisClient):
+        fake_mantis.options.options["http"] = {"pool-connections": 2, "pool-maxsize": 32}
+        adapter = fake_mantis.http.session.get_adapter(fake_mantis.http.api_url)
+        assert adapter._pool_connections == 2  # type: ignore
+        assert adapter._pool_maxsize == 32  # type: ignore
+
+    def test_requests_go_through_session(self, fake_mantis: MantisClient, requests_mock):
+        requests_mock.get(f'{fake_mantis.http.api_url}/myself', json={'displayName': 'Buddy'})
+        fake_mantis.http._get("myself")
+        fake_mantis.http._get("myself")
+        assert requests_mock.call_count == 2
+        assert requests_mock.last_request.headers["Authorization"].startswith("Basic ")
+
+    def test_close_releases_session(self, fake_mantis: MantisClient):
+        session = fake_mantis.http.session
+        fake_mantis.http.close()
+        assert fake_mantis.http.session is not session
+
+    def test_retries_honour_retry_after(self, fake_mantis: MantisClient, requests_mock):
+        requests_mock.get(f'{fake_mantis.http.api_url}/myself', [
+            {'status_code': 429, 'headers': {'Retry-After': '3'}},
+            {'status_code': 503},
+            {'json': {'displayName': 'Buddy'}},
+        ])
+        with patch('mantis.http.time.sleep') as sleep:
+            response = fake_mantis.http._get("myself")
+        assert response.json() == {'displayName': 'Buddy'}
+        assert requests_mock.call_count == 3
+        assert sleep.call_args_list[0].args == (3.0,)
+        # Without Retry-After: full jitter up to backoff-base * 2 ** attempt.
+        assert 0 <= sleep.call_args_list[1].args[0] <= 1.0
+
+    def test_retries_give_up_after_max_retries(self, fake_mantis: MantisClient, requests_mock):
+        fake_mantis.options.options["http"] = {"max-retries": 2}
+        requests_mock.put(f'{fake_mantis.http.api_url}/issue/ECS-1', status_code=503, headers={'Retry-After': '1'})
+        with patch('mantis.http.time.sleep') as sleep:
+            response = fake_mantis.http._put("issue/ECS-1", {})
+        assert response.status_code == 503
+        assert requests_mock.call_count == 3
+        assert sleep.call_count == 2
+
+    def test_post_is_not_retried_after_gateway_errors(self, fake_mantis: MantisClient, requests_mock):
+        requests_mock.post(f'{fake_mantis.http.api_url}/issue', status_code=504)
+        with patch('mantis.http.time.sleep') as sleep:
+            assert fake_mantis.http._post("issue", {}).status_code == 504
+        assert requests_mock.call_count == 1
+        assert sleep.call_count == 0
+
+    def test_post_is_retried_when_turned_away(self, fake_mantis: MantisClient, requests_mock):
+        requests_mock.post(f'{fake_mantis.http.api_url}/issue', [
+            {'status_code': 429},
+            {'status_code': 503, 'headers': {'Retry-After': '2'}},
+            {'status_code': 201, 'json': {'key': 'ECS-7'}},
+        ])
+        with patch('mantis.http.time.sleep'):
+            assert fake_mantis.http._post("issue", {}).status_code == 201
+        assert requests_mock.call_count == 3
+
+    def test_client_errors_are_not_retried(self, fake_mantis: MantisClient, requests_mock):
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-9', status_code=404)
+        with patch('mantis.http.time.sleep') as sleep:
+            assert fake_mantis.http._get("issue/ECS-9").status_code == 404
+        assert sleep.call_count == 0
+
+    def test_token_bucket_allows_bursts_then_waits(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        with patch('mantis.http.time.monotonic', return_value=100.0), patch('mantis.http.time.sleep') as sleep:
+            bucket.updated = 100.0
+            bucket.acquire()
+            bucket.acquire()
+            assert sleep.call_count == 0
+            bucket.acquire()
+            bucket.acquire()
+        assert [call.args[0] for call in sleep.call_args_list] == [0.1, 0.2]
+
+    def test_token_bucket_is_disabled_by_default(self, fake_mantis: MantisClient):
+        assert fake_mantis.http.limiter.rate == 0
+        with patch('mantis.http.time.sleep') as sleep:
+            for _ in range(20):
+                fake_mantis.http.limiter.acquire()
+        assert sleep.call_count == 0
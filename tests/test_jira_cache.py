@@ -1,7 +1,17 @@
 import json
+import os
+import sqlite3
+import stat
+import subprocess
+import sys
+import time
+from unittest.mock import patch
 import pytest
 
+from mantis.cache import NEW_FILE_MODE, Cache
+from mantis.compression import GZIP_MAGIC, ZSTD_MAGIC
 from mantis.mantis_client import MantisClient
+from mantis.sqlite_cache import SqliteCache
 from tests.data import CacheData, get_issuetypes_response
 
 
@@ -50,8 +60,8 @@ class TestCache:
         assert something_1 is not None
 
         # remove with cache.remove
-        assert self.mantis.cache.remove("issues/TASK-1.json")
-        assert not self.mantis.cache.remove("issues/TASK-1.json")
+        assert self.mantis.cache.remove("issues/TASK/01/TASK-1.json")
+        assert not self.mantis.cache.remove("issues/TASK/01/TASK-1.json")
         nothing_1 = self.mantis.cache.get_issue("TASK-1")
         assert nothing_1 is None
 
@@ -93,3 +103,339 @@ class TestCache:
             return {_[field_name] for _ in list_of_issuetypes}
         assert len(CacheData().issuetypes.get("issueTypes", [])) == 5
         assert selector('name') == {'Subtask', 'Story', 'Bug', 'Task', 'Epic'}
+
+    def test_cache_lru_counts_hits_and_misses(self):
+        self.mantis.cache.write_issue("TASK-1", self.issue_payload)
+        first = self.mantis.cache.get_issue("TASK-1")
+        second = self.mantis.cache.get_issue("TASK-1")
+        assert first is second
+        assert (self.mantis.cache.lru.hits, self.mantis.cache.lru.misses) == (1, 1)
+        assert str(self.mantis.cache.lru) == "Cache reads: 1 hits, 1 misses (hit rate: 50%), 1 entries in memory"
+
+    def test_cache_lru_is_invalidated_by_mtime(self):
+        self.mantis.cache.write_issue("TASK-1", self.issue_payload)
+        assert self.mantis.cache.get_issue("TASK-1") == self.issue_payload
+        # Changed on disk by someone else
+        with open(self.mantis.cache.issue_file("TASK-1"), "w") as f:
+            json.dump({"key": "TASK-1", "fields": {}}, f)
+        assert self.mantis.cache.get_issue("TASK-1") == {"key": "TASK-1", "fields": {}}
+        (self.mantis.cache.issue_file("TASK-1")).unlink()
+        assert self.mantis.cache.get_issue("TASK-1") is None
+        assert len(self.mantis.cache.lru) == 0
+
+    def test_cache_lru_is_invalidated_by_writes(self):
+        self.mantis.cache.write_issue("TASK-1", self.issue_payload)
+        assert self.mantis.cache.get_issue("TASK-1") == self.issue_payload
+        self.mantis.cache.write_issue("TASK-1", {"key": "TASK-1"})
+        assert self.mantis.cache.get_issue("TASK-1") == {"key": "TASK-1"}
+
+    def test_cache_lru_is_bounded(self):
+        self.mantis.cache.lru.maxsize = 2
+        for key in ("TASK-1", "TASK-2", "TASK-3"):
+            self.mantis.cache.write_issue(key, self.issue_payload)
+            self.mantis.cache.get_issue(key)
+        assert len(self.mantis.cache.lru) == 2
+        self.mantis.cache.get_issue("TASK-1")
+        assert self.mantis.cache.lru.hits == 0
+
+    def _age(self, file, seconds: float) -> None:
+        past = time.time() - seconds
+        os.utime(file, (past, past))
+
+    def test_cache_expired_entries_are_misses_without_stale_while_revalidate(self):
+        self.mantis.options.options['cache'] = {'stale-while-revalidate': False, 'ttl': {'issues': 60}}
+        self.mantis.cache.write_issue("TASK-1", self.issue_payload)
+        assert self.mantis.cache.get_issue("TASK-1") == self.issue_payload
+        self._age(self.mantis.cache.issue_file("TASK-1"), 61)
+        assert self.mantis.cache.get_issue("TASK-1") is None
+        # Entries without a namespace never expire.
+        self.mantis.cache.write_sync_watermark('project = TEST', '2026/10/18 12:00')
+        self._age(self.mantis.cache.system / "sync.json", 10**6)
+        assert self.mantis.cache.get_sync_watermark('project = TEST') == '2026/10/18 12:00'
+
+    def test_cache_ttl_of_zero_keeps_entries_forever(self):
+        self.mantis.options.options['cache'] = {'ttl': {'createmeta': 0}}
+        self.mantis.cache.write_createmeta("Epic", CacheData().createmeta_epic)
+        self._age(self.mantis.cache.createmeta / "createmeta_epic.json", 10**6)
+        assert self.mantis.cache.get_createmeta_from_cache("Epic") == CacheData().createmeta_epic
+
+    def test_cache_serves_stale_entries_while_refreshing(self, requests_mock):
+        requests_mock.get(f'{self.mantis.http.api_url}/issue/ECS-1', json=CacheData().ecs_1)
+        stale = CacheData().ecs_1
+        stale['fields']['summary'] = 'Stale summary'
+        self.mantis.cache.write_issue("ECS-1", stale)
+        self._age(self.mantis.cache.issue_file("ECS-1"), 301)
+
+        issue = self.mantis.jira.issues.get("ECS-1")
+        assert issue.get_field('summary') == 'Stale summary'
+        self.mantis.cache.wait_for_refreshes()
+        assert requests_mock.call_count == 1
+        assert self.mantis.cache.get_issue("ECS-1") == CacheData().ecs_1
+
+    def _fill(self, cache) -> None:
+        for issue in (CacheData().ecs_1, CacheData().ecs_3, CacheData().ecs_5):
+            cache.write_issue(issue['key'], issue)
+            cache.write_editmeta(issue['key'], {'fields': {}})
+        cache.write_createmeta("Epic", CacheData().createmeta_epic)
+        cache.write_createmeta("Bug", CacheData().createmeta_bug)
+        cache.write_issuetypes_to_system_cache(CacheData().issuetypes)
+
+    def test_cache_invalidate_entries_by_namespace(self):
+        cache = self.mantis.cache
+        self._fill(cache)
+        assert cache.invalidate_entries(["issues"]) == 3
+        assert cache.get_issue("ECS-1") is None
+        assert cache.get_editmeta_from_cache("ECS-1") is not None
+        assert cache.get_createmeta_from_cache("Epic") is not None
+        with pytest.raises(ValueError):
+            cache.invalidate_entries(["nonsense"])
+
+    def test_cache_invalidate_entries_by_issuetype(self):
+        cache = self.mantis.cache
+        self._fill(cache)
+        # The issue, its editmeta and the createmeta of the type
+        assert cache.invalidate_entries(issuetype="bug") == 3
+        assert cache.get_issue("ECS-3") is None
+        assert cache.get_editmeta_from_cache("ECS-3") is None
+        assert cache.get_createmeta_from_cache("Bug") is None
+        assert cache.get_issue("ECS-1") is not None
+        assert cache.get_createmeta_from_cache("Epic") is not None
+        assert cache.get_issuetypes_from_system_cache() is not None
+
+    def test_cache_invalidate_entries_by_key_glob_and_age(self):
+        cache = self.mantis.cache
+        self._fill(cache)
+        self._age(cache.issue_file("ECS-1"), 120)
+        assert cache.invalidate_entries(["issues"], keys="ECS-[13]", older_than=60) == 1
+        assert cache.get_issue("ECS-1") is None
+        assert cache.get_issue("ECS-3") is not None
+        assert cache.invalidate_entries(keys="ecs-*") == 5
+        assert list(cache.iter_dir("issues")) == []
+        assert cache.get_createmeta_from_cache("Epic") is not None
+
+    def test_cache_shards_issues_by_project_and_number(self):
+        cache = self.mantis.cache
+        assert cache.issue_file("ECS-12345") == cache.issues / "ECS" / "45" / "ECS-12345.json"
+        assert cache.issue_file("ECS-7", projected=True) == cache.projected_issues / "ECS" / "07" / "ECS-7.json"
+        cache.write_issue("ECS-12345", CacheData().ecs_1)
+        cache.write_issue("ECS-2", CacheData().ecs_2)
+        assert sorted(file.name for file in cache.iter_dir("issues")) == ["ECS-12345.json", "ECS-2.json"]
+        assert cache.get_issue("ECS-12345") == CacheData().ecs_1
+
+    def test_cache_migrates_flat_issue_layout(self):
+        for issue in (CacheData().ecs_1, CacheData().ecs_2):
+            with open(self.mantis.cache.issues / f"{issue['key']}.json", "w") as f:
+                json.dump(issue, f)
+        cache = Cache(self.mantis)
+        assert not list(cache.issues.glob("*.json"))
+        assert cache.issue_file("ECS-1").exists()
+        assert cache.get_issue("ECS-2") == CacheData().ecs_2
+        assert cache.migrate_issue_layout() == 0
+
+    def test_cache_writes_are_atomic(self):
+        cache = self.mantis.cache
+        cache.write_issue("TASK-1", self.issue_payload)
+        with patch('mantis.cache.os.replace', side_effect=KeyboardInterrupt), pytest.raises(KeyboardInterrupt):
+            cache.write_issue("TASK-1", {'key': 'TASK-1', 'fields': {}})
+        assert cache.get_issue("TASK-1") == self.issue_payload
+        assert os.listdir(cache.issue_file("TASK-1").parent) == ["TASK-1.json"]
+
+    @pytest.mark.skipif(sys.platform == 'win32', reason='file modes are not available on Windows')
+    def test_cache_writes_keep_file_modes(self):
+        cache = self.mantis.cache
+        file = cache.issue_file("TASK-1")
+        cache.write_issue("TASK-1", self.issue_payload)
+        assert stat.S_IMODE(file.stat().st_mode) == NEW_FILE_MODE
+        os.chmod(file, 0o640)
+        cache.write_issue("TASK-1", self.issue_payload)
+        assert stat.S_IMODE(file.stat().st_mode) == 0o640
+
+    def test_cache_fsyncs_once_per_batch(self):
+        cache = self.mantis.cache
+        self.mantis.options.options['cache'] = {'fsync': True}
+        with patch('mantis.cache._fsync') as fsync, patch('mantis.cache.os.fsync') as os_fsync:
+            cache.write_issue("TASK-1", self.issue_payload)
+            assert os_fsync.call_count == 1
+            assert fsync.call_count == 1
+            with cache.batch():
+                cache.write_issue("TASK-2", self.issue_payload)
+                cache.write_editmeta("TASK-2", {'fields': {}})
+                assert fsync.call_count == 1
+            assert os_fsync.call_count == 1
+            # Both files, then both directories
+            assert fsync.call_count == 5
+
+    @pytest.mark.skipif(sys.platform == 'win32', reason='flock is not available on Windows')
+    def test_cache_lock_excludes_other_processes(self):
+        cache = self.mantis.cache
+        try_lock = (
+            "import fcntl, os, sys;"
+            "fd = os.open(sys.argv[1], os.O_RDWR);"
+            "fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)"
+        )
+        lock_file = str(cache.root / cache.lock_name)
+        # Taken twice, as the lock is reentrant
+        with cache.lock, cache.lock:
+            locked = subprocess.run([sys.executable, '-c', try_lock, lock_file], capture_output=True, check=False)
+            assert locked.returncode != 0
+        subprocess.run([sys.executable, '-c', try_lock, lock_file], check=True)
+        cache.invalidate()
+        assert (cache.root / cache.lock_name).exists()
+
+    def test_cache_compression_is_detected_on_read(self):
+        self.mantis.cache.write_issue("TASK-1", self.issue_payload)
+        self.mantis.options.options['cache'] = {'compression': 'gzip'}
+        cache = Cache(self.mantis)
+        assert cache.get_issue("TASK-1") == self.issue_payload
+        cache.write_issue("TASK-2", self.issue_payload)
+        assert (cache.issue_file("TASK-2")).read_bytes().startswith(GZIP_MAGIC)
+        assert cache.get_issue("TASK-2") == self.issue_payload
+        self.mantis.options.options['cache'] = {}
+        assert Cache(self.mantis).get_issue("TASK-2") == self.issue_payload
+
+    def test_cache_compress_entries_keeps_write_times(self):
+        for issue in (CacheData().ecs_1, CacheData().ecs_2):
+            self.mantis.cache.write_issue(issue['key'], issue)
+        self._age(self.mantis.cache.issue_file("ECS-1"), 100)
+        modified = (self.mantis.cache.issue_file("ECS-1")).stat().st_mtime_ns
+        self.mantis.options.options['cache'] = {'compression': 'gzip'}
+        cache = Cache(self.mantis)
+        count, before, after = cache.compress_entries()
+        assert count == 2
+        assert after < before / 2
+        assert (cache.issue_file("ECS-1")).stat().st_mtime_ns == modified
+        assert cache.get_issue("ECS-1") == CacheData().ecs_1
+
+    def test_cache_zstd_with_trained_dictionary(self):
+        pytest.importorskip('zstandard')
+        for i in range(200):
+            issue = CacheData().ecs_1
+            issue['key'] = f'ECS-{i}'
+            issue['fields']['summary'] = f'Summary of issue number {i} ' * (i % 7 + 1)
+            self.mantis.cache.write_issue(issue['key'], issue)
+        self.mantis.options.options['cache'] = {'compression': 'zstd'}
+        cache = Cache(self.mantis)
+        cache.write_issue("ECS-0", CacheData().ecs_1)
+        cache.compress_entries(train_dictionary=True)
+        assert (cache.issue_file("ECS-1")).read_bytes().startswith(ZSTD_MAGIC)
+        assert cache.get_issue("ECS-0") == CacheData().ecs_1
+        cache.invalidate()
+        assert list((cache.root / cache.dictionaries_name).iterdir())
+
+    def test_cache_evicts_least_recently_used_completions(self):
+        cache = self.mantis.cache
+        for i, key in enumerate(("a", "b", "c")):
+            cache.write_completion(key, "gpt-4.1", "x" * 100, max_bytes=10_000)
+            os.utime(cache.completions / f"{key}.json", (1000 + i, 1000 + i))
+        # Reading "a" makes "b" the least recently used
+        assert cache.get_completion("a") == "x" * 100
+        size = (cache.completions / "a.json").stat().st_size
+        cache.write_completion("d", "gpt-4.1", "x" * 100, max_bytes=size * 3)
+        assert sorted(file.stem for file in cache.iter_dir("completions")) == ["a", "c", "d"]
+        assert cache.get_completion("b") is None
+        assert cache.invalidate_entries(["completions"]) == 3
+
+
+class TestSqliteCache:
+    @pytest.fixture(autouse=True)
+    def _request_jira(self, fake_mantis: MantisClient):
+        self.mantis = fake_mantis
+        self.cache = SqliteCache(fake_mantis)
+        yield
+        self.cache.close()
+
+    def test_sqlite_cache_uses_wal_mode(self):
+        assert self.cache.connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+    def test_sqlite_cache_roundtrips_issue(self, minimal_issue_payload: dict):
+        assert self.cache.get_issue("TASK-1") is None
+        self.cache.write_issue("TASK-1", minimal_issue_payload)
+        assert self.cache.get_issue("TASK-1") == minimal_issue_payload
+        assert not (self.cache.issue_file("TASK-1")).exists()
+        assert [file.name for file in self.cache.iter_dir("issues")] == ["TASK-1.json"]
+        assert self.cache.remove_issue("TASK-1")
+        assert not self.cache.remove_issue("TASK-1")
+        assert self.cache.get_issue("TASK-1") is None
+
+    def test_sqlite_cache_roundtrips_system_cache(self):
+        self.cache.write_createmeta("Epic", CacheData().createmeta_epic)
+        self.cache.write_issuetypes_to_system_cache(CacheData().issuetypes)
+        assert self.cache.get_createmeta_from_cache("Epic") == CacheData().createmeta_epic
+        assert self.cache.get_issuetypes_from_system_cache() == CacheData().issuetypes
+        self.cache.invalidate()
+        assert self.cache.get_createmeta_from_cache("Epic") is None
+
+    def test_sqlite_cache_batch_commits_once(self, minimal_issue_payload: dict):
+        other_connection = sqlite3.connect(self.cache.root / SqliteCache.database_name)
+        with self.cache.batch():
+            self.cache.write_issue("TASK-1", minimal_issue_payload)
+            self.cache.write_issue("TASK-2", minimal_issue_payload)
+            assert other_connection.execute("SELECT COUNT(*) FROM entries").fetchone() == (0,)
+        assert other_connection.execute("SELECT COUNT(*) FROM entries").fetchone() == (2,)
+        other_connection.close()
+
+    def test_sqlite_cache_imports_directory_layout(self, minimal_issue_payload: dict):
+        self.mantis.cache.issue_file("TASK-1").parent.mkdir(parents=True)
+        with open(self.mantis.cache.issue_file("TASK-1"), "w") as f:
+            json.dump(minimal_issue_payload, f)
+        with open(self.mantis.cache.createmeta / "createmeta_epic.json", "w") as f:
+            json.dump(CacheData().createmeta_epic, f)
+        assert self.cache.import_directory_layout() == 2
+        assert self.cache.get_issue("TASK-1") == minimal_issue_payload
+        assert self.cache.get_createmeta_from_cache("Epic") == CacheData().createmeta_epic
+
+    def test_sqlite_cache_imports_entry_namespaces_only(self):
+        files_cache = self.mantis.cache
+        files_cache.write_issuetypes_to_system_cache(CacheData().issuetypes)
+        files_cache.write_validators(files_cache.system / "issuetypes.json", {'etag': '"1"'})
+        files_cache.write_validators(files_cache.system / "projects.json", {'etag': '"2"'})
+        files_cache.write_completion("a", "gpt-4.1", "x", max_bytes=10_000)
+        (files_cache.root / "unrelated.json").write_text("{}")
+        assert self.cache.import_directory_layout() == 2
+        assert self.cache.get_issuetypes_from_system_cache() == CacheData().issuetypes
+        assert self.cache.get_completion("a") == "x"
+        assert self.cache.get_validators(self.cache.system / "issuetypes.json") == {'etag': '"1"'}
+        # Only the validators of imported entries are kept
+        assert self.cache.get_validators(self.cache.system / "projects.json") == {}
+        assert self.cache.connection.execute(
+            "SELECT directory, filename FROM entries WHERE filename != 'validators.json' ORDER BY directory"
+        ).fetchall() == [("completions", "a.json"), ("system", "issuetypes.json")]
+
+    def test_sqlite_cache_imports_compressed_directory_layout(self):
+        self.mantis.options.options['cache'] = {'compression': 'gzip'}
+        files_cache = Cache(self.mantis)
+        files_cache.write_issue("ECS-1", CacheData().ecs_1)
+        files_cache.write_createmeta("Epic", CacheData().createmeta_epic)
+        assert files_cache.issue_file("ECS-1").read_bytes().startswith(GZIP_MAGIC)
+        self.mantis.options.options['cache'] = {}
+        assert self.cache.import_directory_layout() == 2
+        assert self.cache.get_issue("ECS-1") == CacheData().ecs_1
+        assert self.cache.get_createmeta_from_cache("Epic") == CacheData().createmeta_epic
+
+    def test_sqlite_cache_expires_entries_by_write_time(self, minimal_issue_payload: dict):
+        self.mantis.options.options['cache'] = {'stale-while-revalidate': False}
+        self.cache.write_issue("TASK-1", minimal_issue_payload)
+        assert self.cache.get_issue("TASK-1") == minimal_issue_payload
+        self.cache.connection.execute("UPDATE entries SET updated = ?", (time.time() - 301,))
+        assert self.cache.get_issue("TASK-1") is None
+
+    def test_sqlite_cache_invalidates_entries(self):
+        for issue in (CacheData().ecs_1, CacheData().ecs_3):
+            self.cache.write_issue(issue['key'], issue)
+        self.cache.write_createmeta("Epic", CacheData().createmeta_epic)
+        self.cache.connection.execute(
+            "UPDATE entries SET updated = ? WHERE filename = 'ECS-1.json'", (time.time() - 120,)
+        )
+        assert self.cache.invalidate_entries(older_than=60) == 1
+        assert self.cache.invalidate_entries(issuetype="Bug") == 1
+        assert self.cache.get_issue("ECS-3") is None
+        assert self.cache.get_createmeta_from_cache("Epic") == CacheData().createmeta_epic
+
+    def test_sqlite_cache_evicts_least_recently_used_completions(self):
+        self.cache.write_completion("a", "gpt-4.1", "x" * 100, max_bytes=10_000)
+        self.cache.write_completion("b", "gpt-4.1", "x" * 100, max_bytes=10_000)
+        self.cache.connection.execute("UPDATE entries SET updated = 1000 WHERE directory = 'completions'")
+        assert self.cache.get_completion("a") == "x" * 100
+        size = self.cache._size(self.cache.completions / "a.json")
+        self.cache.write_completion("c", "gpt-4.1", "x" * 100, max_bytes=size * 2)
+        assert [file.stem for file in self.cache.iter_dir("completions")] == ["a", "c"]
@@ -25,8 +25,8 @@ class TestJiraClient:
     def test_cache_exists(self, fake_mantis: MantisClient):
         assert str(fake_mantis.cache.root) != ".jira_cache_test"
         list_of = [str(_).split('/')[-1] for _ in fake_mantis.cache.root.iterdir()]
-        assert len(list(fake_mantis.cache.root.iterdir())) == 2, f'Iter root expected two values, got: {list_of}'
-        assert {item.name for item in fake_mantis.cache.root.iterdir()} == {"system", "issues"}
+        assert len(list(fake_mantis.cache.root.iterdir())) == 3, f'Iter root expected three values, got: {list_of}'
+        assert {item.name for item in fake_mantis.cache.root.iterdir()} == {"system", "issues", "issues_projected"}
         assert len(list(fake_mantis.cache.system.iterdir())) == 4
         assert {item.name for item in fake_mantis.cache.system.iterdir()} == {"createmeta", 'createmeta_schemas', "editmeta", 'editmeta_schemas'}
 
@@ -60,7 +60,7 @@ class TestJiraClient:
 
     def test_get_test_auth_connection_error(self, fake_mantis: MantisClient, capsys):
         with patch(
-            "jira.jira_client.requests.get",
+            "requests.Session.get",
             side_effect=requests.exceptions.ConnectionError,
         ):
             with pytest.raises(SystemExit) as pytest_wrapped_e:
@@ -77,7 +77,7 @@ class TestJiraClient:
 
     def test_get_test_auth_generic_exception(self, fake_mantis: MantisClient, capsys):
         with patch(
-            "jira.jira_client.requests.get",
+            "requests.Session.get",
             side_effect=requests.exceptions.RequestException,
         ):
             with pytest.raises(requests.exceptions.RequestException):
@@ -1,6 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor
 import json
+import os
 import pytest
+import time
 
+from unittest.mock import patch
+
+from jira.config_loader.meta_model_factories import CreatemetaModelFactory
 from mantis.mantis_client import MantisClient
 from tests.data import get_issuetypes_response, update_projects_cache_response, CacheData
 
@@ -60,6 +66,26 @@ class TestConfigLoader:
             'We expect two projects in len(update_projects_cache_response): '
             f'{len(update_projects_cache_response)} Got {got_project_ids_as_ints}')
 
+    def test_metadata_is_revalidated_with_conditional_get(self, fake_mantis: MantisClient, requests_mock):
+        url = f'{fake_mantis.http.api_url}/project'
+        requests_mock.get(url, json=update_projects_cache_response, headers={'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2026 07:28:00 GMT'})
+        projects = fake_mantis.jira.system_config_loader.get_projects()
+        validators = fake_mantis.cache.get_validators(fake_mantis.cache.system / 'projects.json')
+        assert validators['etag'] == '"v1"'
+
+        fake_mantis._no_read_cache = True
+        requests_mock.get(url, status_code=304, headers={'ETag': '"v1"'})
+        assert fake_mantis.jira.system_config_loader.get_projects() == projects
+        assert requests_mock.last_request.headers['If-None-Match'] == '"v1"'
+        assert requests_mock.last_request.headers['If-Modified-Since'] == 'Wed, 21 Oct 2026 07:28:00 GMT'
+        revalidated = fake_mantis.cache.get_validators(fake_mantis.cache.system / 'projects.json')
+        assert revalidated['checked'] >= validators['checked']
+
+        requests_mock.get(url, json=[{'key': 'TEST', 'id': '1'}], headers={'ETag': '"v2"'})
+        assert fake_mantis.jira.system_config_loader.get_projects() == [{'key': 'TEST', 'id': '1'}]
+        assert json.loads(fake_mantis.cache.read(fake_mantis.cache.system / 'projects.json') or '') == [{'key': 'TEST', 'id': '1'}]
+        assert fake_mantis.cache.get_validators(fake_mantis.cache.system / 'projects.json')['etag'] == '"v2"'
+
     def test_update_issuetypes_data(self, fake_mantis: MantisClient, requests_mock):
         requests_mock.get(f'{fake_mantis.http.api_url}/issue/createmeta/TEST/issuetypes', json=CacheData().issuetypes)
 
@@ -109,6 +135,31 @@ class TestConfigLoader:
         assert get_allowed_issuetype_name("createmeta_story.json") == 'Story'
         assert get_allowed_issuetype_name("createmeta_bug.json") == 'Bug'
 
+    @pytest.mark.slow
+    def test_refresh_system_metadata_keeps_issues(self, fake_mantis: MantisClient, requests_mock):
+        requests_mock.get(f'{fake_mantis.http.api_url}/project', json=CacheData().projects)
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/createmeta/TEST/issuetypes', json=CacheData().issuetypes)
+        for issuetype_id, createmeta in zip(range(10001, 10006), (
+            CacheData().createmeta_epic,
+            CacheData().createmeta_subtask,
+            CacheData().createmeta_task,
+            CacheData().createmeta_story,
+            CacheData().createmeta_bug,
+        )):
+            requests_mock.get(f'{fake_mantis.http.api_url}/issue/createmeta/TEST/issuetypes/{issuetype_id}', json=createmeta)
+        fake_mantis.cache.write_issue('ECS-1', CacheData().ecs_1)
+        fake_mantis.cache.write_createmeta('Removed', {'fields': []})
+        fake_mantis.cache.write_createmeta_schema('Removed', {'fields': []})
+
+        # Obsolete createmeta is dropped without reading the cached issues
+        with patch.object(fake_mantis.cache, '_issuetype_of', side_effect=AssertionError):
+            allowed_types = fake_mantis.jira.system_config_loader.refresh_system_metadata()
+        assert set(allowed_types) == {'Epic', 'Subtask', 'Task', 'Story', 'Bug'}
+        assert fake_mantis.cache.get_issue('ECS-1') == CacheData().ecs_1
+        assert fake_mantis.cache.get_createmeta_from_cache('Removed') is None
+        assert not (fake_mantis.cache.createmeta_schemas / 'removed.json').exists()
+        assert fake_mantis.cache.get_createmeta_from_cache('Story') == CacheData().createmeta_story
+
     @pytest.mark.slow
     def test_compile_plugins(self, fake_mantis: MantisClient, requests_mock):
         requests_mock.get(f'{fake_mantis.http.api_url}/project', json={"name": "Testtype"})
@@ -120,3 +171,73 @@ class TestConfigLoader:
         assert (len(list(fake_mantis.plugins_dir.iterdir())) == 0), f"Not empty: {fake_mantis.plugins_dir}"
         fake_mantis.jira.system_config_loader.compile_plugins()
         assert len(list(fake_mantis.plugins_dir.iterdir())) == 1
+
+    @pytest.mark.slow
+    def test_compile_plugins_skips_up_to_date_outputs(self, fake_mantis: MantisClient):
+        loader = fake_mantis.jira.system_config_loader
+        input_file = fake_mantis.cache.createmeta / "Testtype.json"
+        input_file.write_text('{"name": "Testtype"}')
+
+        assert list(loader.compile_plugins(max_workers=2)) == [fake_mantis.plugins_dir / "testtype.py"]
+        assert loader.compile_plugins(max_workers=2) == {}
+
+        output_ns = (fake_mantis.plugins_dir / "testtype.py").stat().st_mtime_ns
+        os.utime(input_file, ns=(output_ns + 1, output_ns + 1))
+        assert list(loader.compile_plugins(max_workers=2)) == [fake_mantis.plugins_dir / "testtype.py"]
+
+    def test_createmeta_factory_is_shared_per_issuetype(self, fake_mantis: MantisClient):
+        loader = fake_mantis.jira.system_config_loader
+        fake_mantis.cache.write_createmeta('Epic', CacheData().createmeta_epic)
+        with patch('jira.config_loader.meta_model_factories.CreatemetaModelFactory._write_plugin') as write_plugin:
+            first = loader.get_createmeta_factory('Epic')
+            second = loader.get_createmeta_factory('epic')
+            assert first is second
+            assert write_plugin.call_count == 1
+
+            changed = CacheData().createmeta_epic
+            changed['fields'] = changed['fields'][:3]
+            fake_mantis.cache.write_createmeta('Epic', changed)
+            third = loader.get_createmeta_factory('Epic')
+            assert third is not first
+            assert len(third.keys()) == 3
+            assert write_plugin.call_count == 2
+
+    def test_createmeta_factory_is_built_once_across_threads(self, fake_mantis: MantisClient):
+        loader = fake_mantis.jira.system_config_loader
+
+        def slow_factory(*args):
+            time.sleep(0.05)
+            return object()
+
+        with (
+            patch('jira.config_loader.config_loader.CreatemetaModelFactory', side_effect=slow_factory) as factory,
+            ThreadPoolExecutor(max_workers=4) as executor,
+        ):
+            built = list(executor.map(lambda _: loader.get_createmeta_factory('Epic', CacheData().createmeta_epic), range(4)))
+        assert factory.call_count == 1
+        assert all(each is built[0] for each in built)
+
+    def test_meta_plugins_are_only_regenerated_when_the_schema_changes(self, fake_mantis: MantisClient):
+        def fake_generate(_, output, **kwargs):
+            output.write_text('# generated')
+
+        with patch('jira.config_loader.meta_model_factories.generate', side_effect=fake_generate) as generate:
+            CreatemetaModelFactory(CacheData().createmeta_epic, 'Epic', fake_mantis.jira)
+            assert generate.call_count == 1
+            assert {file.name for file in fake_mantis.plugins_dir.iterdir()} == {'epic_createmeta.py', 'epic_createmeta.sha256'}
+            CreatemetaModelFactory(CacheData().createmeta_epic, 'Epic', fake_mantis.jira)
+            assert generate.call_count == 1
+
+            changed = CacheData().createmeta_epic
+            changed['fields'] = changed['fields'][:3]
+            CreatemetaModelFactory(changed, 'Epic', fake_mantis.jira)
+            assert generate.call_count == 2
+
+    def test_meta_plugins_can_be_deferred_to_compile_plugins(self, fake_mantis: MantisClient):
+        fake_mantis.options.options.setdefault('jira', {})['defer-plugins'] = True
+        fake_mantis.cache.write_createmeta('Epic', CacheData().createmeta_epic)
+        with patch('jira.config_loader.meta_model_factories.generate') as generate:
+            fake_mantis.jira.system_config_loader.get_createmeta_factory('Epic')
+            assert generate.call_count == 0
+            assert fake_mantis.jira.system_config_loader.compile_meta_plugins() == ['epic']
+            assert generate.call_count == 1
@@ -1,4 +1,15 @@
 
+import os
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import frontmatter  # type: ignore
+import httpx
+import openai
+import pytest
+
+from enums import TextFormat
 from jira.jira_issues import JiraIssue
 from mantis.mantis_client import MantisClient
 from tests.data import CacheData
@@ -17,11 +28,14 @@ class TestJiraDraft:
         
         assert len(list(fake_mantis.drafts_dir.iterdir())) == 0
         task_1 = fake_mantis.jira.issues.get("ECS-1")
+        # Drafts are only written once they are used
+        assert len([*fake_mantis.drafts_dir.iterdir()]) == 0
+        assert task_1.draft.created
         assert len([*fake_mantis.drafts_dir.iterdir()]) == 1
         assert isinstance(task_1, JiraIssue)
 
         minimal_issue_payload['key'] = "ECS-2"
-        _ = fake_mantis.jira.issues.get("ECS-2")
+        _ = fake_mantis.jira.issues.get("ECS-2").draft
         assert len([*fake_mantis.drafts_dir.iterdir()]) == 2
 
         with open(fake_mantis.drafts_dir / "ECS-1.md", "r") as f:
@@ -83,6 +97,139 @@ class TestJiraDraft:
         assert isinstance(draft_content, str)
         assert draft_content == "Implement user authentication for the checkout system."
 
+    def test_draft_is_parsed_once_until_the_file_changes(self, fake_mantis: MantisClient, requests_mock):
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-1', json=CacheData().ecs_1)
+        draft = fake_mantis.jira.issues.get(key='ECS-1').draft
+        with patch('drafts.draft.frontmatter.loads', wraps=frontmatter.loads) as loads:
+            for key in draft.iter_draft_field_keys():
+                draft.get(key)
+            assert draft.content == "Implement user authentication for the checkout system."
+            copy = draft.read_draft()
+            copy['summary'] = 'Changed in memory'
+            assert draft.get('summary') == '(Sample) User Authentication'
+            assert loads.call_count == 1
+
+            draft.content = "New content"
+            assert draft.content == "New content"
+            assert loads.call_count == 2
+
+            # Edited by the user, keeping the size and mtime: not noticed
+            stat = os.stat(draft.draft_path)
+            raw = draft.raw_draft.replace('New content', 'Old content')
+            draft.draft_path.write_text(raw)
+            os.utime(draft.draft_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            assert draft.content == "New content"
+            os.utime(draft.draft_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+            assert draft.content == "Old content"
+            assert loads.call_count == 3
+
+    def test_materialize_drafts_of_cached_issues(self, fake_mantis: MantisClient):
+        fake_mantis.cache.write_issue('ECS-1', CacheData().ecs_1)
+        fake_mantis.cache.write_issue('ECS-2', CacheData().ecs_2)
+        assert [draft.created for draft in fake_mantis.jira.issues.materialize_drafts(['ECS-1'])] == [True]
+        drafts = fake_mantis.jira.issues.materialize_drafts()
+        assert [(draft.key, draft.created) for draft in drafts] == [('ECS-1', False), ('ECS-2', True)]
+        assert {file.name for file in fake_mantis.drafts_dir.iterdir()} == {'ECS-1.md', 'ECS-2.md'}
+
+    def test_materialize_drafts_skips_failing_issues_only(self, fake_mantis: MantisClient, capsys):
+        fake_mantis.cache.write_issue('ECS-1', CacheData().ecs_1)
+        fake_mantis.cache.write_issue('ECS-2', CacheData().ecs_2)
+        issues = fake_mantis.jira.issues
+        get = issues.get
+
+        def failing_get(key: str, **kwargs):
+            if key == 'ECS-1':
+                raise ValueError('Response is empty')
+            return get(key, **kwargs)
+
+        with patch.object(issues, 'get', side_effect=failing_get):
+            assert [draft.key for draft in issues.materialize_drafts()] == ['ECS-2']
+        assert 'Failed to materialize the draft of ECS-1: Response is empty' in capsys.readouterr().out
+        # Programming errors are not reported as failed drafts
+        with patch.object(issues, 'get', side_effect=AttributeError('oops')), pytest.raises(AttributeError):
+            issues.materialize_drafts()
+
+    def test_materialize_drafts_isolates_http_and_assistant_failures(
+        self, fake_mantis: MantisClient, requests_mock, capsys
+    ):
+        issues = [CacheData().ecs_1, CacheData().ecs_2, CacheData().ecs_3]
+        for data in issues:
+            fake_mantis.cache.write_issue(data['key'], data)
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-9', status_code=403)
+        fake_mantis.options.parser.chat_gpt_activated = True
+        fake_mantis.options.options["openai"] = {"convert-with-assistant": True}
+        client = fake_mantis.open_ai_client
+        client.disabled = False
+
+        def create(model, messages):
+            if messages[1]['content'] == issues[1]['fields']['description']:
+                raise openai.APIConnectionError(request=httpx.Request('POST', 'https://api.openai.com'))
+            return MagicMock(choices=[MagicMock(message=MagicMock(content="Converted"))])
+
+        client.open_ai = MagicMock()
+        client.open_ai.chat.completions.create.side_effect = create
+        drafts = fake_mantis.jira.issues.materialize_drafts(['ECS-1', 'ECS-2', 'ECS-9', 'ECS-3'], max_workers=4)
+        assert [draft.key for draft in drafts] == ['ECS-1', 'ECS-3']
+        assert {file.name for file in fake_mantis.drafts_dir.iterdir()} == {'ECS-1.md', 'ECS-3.md'}
+        out = capsys.readouterr().out
+        assert 'Failed to materialize the draft of ECS-2: Connection error.' in out
+        assert 'Failed to materialize the draft of ECS-9: 403 Client Error' in out
+
+    def test_materialize_drafts_bounds_assistant_concurrency(self, fake_mantis: MantisClient):
+        issues = [CacheData().ecs_1, CacheData().ecs_2, CacheData().ecs_3, CacheData().ecs_4]
+        for data in issues:
+            fake_mantis.cache.write_issue(data['key'], data)
+        fake_mantis.options.parser.chat_gpt_activated = True
+        fake_mantis.options.options["openai"] = {"convert-with-assistant": True}
+        client = fake_mantis.open_ai_client
+        client.disabled = False
+        client.lane = threading.BoundedSemaphore(2)
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def create(model, messages):
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+            return MagicMock(choices=[MagicMock(message=MagicMock(content=f"Converted {messages[1]['content']}"))])
+
+        client.open_ai = MagicMock()
+        client.open_ai.chat.completions.create.side_effect = create
+        drafts = fake_mantis.jira.issues.materialize_drafts(max_workers=4)
+        assert [draft.key for draft in drafts] == ['ECS-1', 'ECS-2', 'ECS-3', 'ECS-4']
+        assert all(draft.created and draft.converted for draft in drafts)
+        assert client.open_ai.chat.completions.create.call_count == 4
+        assert max(peak) <= 2
+        assert 'Converted ' + issues[2]['fields']['description'] in drafts[2].content
+
+    def test_draft_converts_descriptions_locally(self, fake_mantis: MantisClient):
+        ecs_1 = CacheData().ecs_1
+        ecs_1['fields']['description'] = 'h2. Goal\n* *Secure* login\n* See [docs|https://example.com/a_b]'
+        fake_mantis.cache.write_issue('ECS-1', ecs_1)
+        fake_mantis.options.parser.chat_gpt_activated = True
+        fake_mantis.open_ai_client.open_ai = MagicMock()
+        draft = fake_mantis.jira.issues.get('ECS-1').draft
+        assert draft.content == '## Goal\n- **Secure** login\n- See [docs](https://example.com/a_b)'
+        assert not draft.converted
+        assert draft.convert(draft.content, TextFormat.JIRA) == ecs_1['fields']['description']
+        fake_mantis.open_ai_client.open_ai.chat.completions.create.assert_not_called()
+
+    def test_materialize_drafts_from_jql(self, fake_mantis: MantisClient, requests_mock):
+        requests_mock.get(
+            f'{fake_mantis.http.api_url}/search',
+            json={'issues': [CacheData().ecs_5, CacheData().ecs_6], 'startAt': 0, 'maxResults': 100, 'total': 2},
+        )
+        drafts = fake_mantis.jira.issues.materialize_drafts(jql='issuetype = Task')
+        assert [(draft.key, draft.created, draft.converted) for draft in drafts] == [
+            ('ECS-5', True, False), ('ECS-6', True, False)
+        ]
+        assert requests_mock.last_request.qs['jql'] == ['issuetype = task']
+        assert fake_mantis.cache.get_issue('ECS-6')
+
 
 def test_remove_draft_header(fake_mantis, requests_mock, tmp_path):
     requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-1', json=CacheData().ecs_1)
@@ -43,3 +43,5 @@ class TestInspector:
             json.dump(CacheData().createmeta_epic, f)
         from_cache = Inspector.get_createmeta_models(fake_mantis.jira)
         assert from_cache
+        # The factories are the ones shared through the config loader
+        assert from_cache['Test'] is fake_mantis.jira.system_config_loader.get_createmeta_factory('Test')
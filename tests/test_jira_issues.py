@@ -26,9 +26,10 @@ class TestJiraIssues:
         mock_response.status_code = 200
         mock_response.ok = True
         mock_response.json = lambda: expected
+        mock_response.content = json.dumps(expected).encode()
         mock_response.headers = {"Content-Type": "text/plain"}
         mock_response.text = "Description"
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             task_1 = fake_mantis.jira.issues.get("TASK-1")
         assert task_1.get("key") == "TASK-1"
         assert task_1.get("fields", {}).get("status") == {"name": "resolved"}
@@ -40,7 +41,7 @@ class TestJiraIssues:
         mock_response.raise_for_status.side_effect.response = (
             mock_response  # assigning itself, this is on purpose
         )
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             with pytest.raises(
                 ValueError,
                 match=('The issue "TEST-999" does not exists in ' 'the project "TEST"'),
@@ -105,7 +106,7 @@ class TestJiraIssues:
         mock_response.raise_for_status.side_effect.response = (
             mock_response  # assigning itself, this is on purpose
         )
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             try:
                 response = fake_mantis.http._get("Task-3")
                 response.raise_for_status()
@@ -139,8 +140,8 @@ class TestJiraIssues:
         requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-1', json=CacheData().ecs_1)
         _ = fake_mantis.jira.issues.get("ECS-1")
         assert fake_mantis.cache.get_issue("ECS-1")
-        assert len([file for file in fake_mantis.cache.issues.iterdir()]) == 1
-        with open(fake_mantis.cache.issues / "ECS-1.json", "r") as f:
+        assert len(list(fake_mantis.cache.iter_dir("issues"))) == 1
+        with open(fake_mantis.cache.issue_file("ECS-1"), "r") as f:
             data = json.load(f)
         assert data["key"] == "ECS-1"
 
@@ -150,3 +151,121 @@ class TestJiraIssues:
             json.dump(minimal_issue_payload, f)
         issue = fake_mantis.jira.issues.get("TASK-1")
         assert issue.get_field("summary") == "redacted"
+
+    def test_jira_issues_get_many_preserves_order_and_writes_to_cache(self, fake_mantis: MantisClient, requests_mock):
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-1', json=CacheData().ecs_1)
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-2', json=CacheData().ecs_2)
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-3', json=CacheData().ecs_3)
+        issues = fake_mantis.jira.issues.get_many(["ECS-3", "ECS-1", "ECS-2"], max_workers=3)
+        assert [issue.key for issue in issues] == ["ECS-3", "ECS-1", "ECS-2"]
+        assert {file.name for file in fake_mantis.cache.iter_dir("issues")} == {"ECS-1.json", "ECS-2.json", "ECS-3.json"}
+
+    def test_jira_issues_get_many_reads_from_cache_and_fetches_editmeta(self, fake_mantis: MantisClient, minimal_issue_payload, requests_mock):
+        with open(fake_mantis.cache.issues / "TASK-1.json", "w") as f:
+            json.dump(minimal_issue_payload, f)
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/TASK-1/editmeta', json={'fields': {'summary': {}}})
+        issues = fake_mantis.jira.issues.get_many(["TASK-1"], with_editmeta=True)
+        assert [issue.key for issue in issues] == ["TASK-1"]
+        assert [request.path for request in requests_mock.request_history] == ['/rest/api/latest/issue/task-1/editmeta']
+        assert fake_mantis.cache.get_editmeta_from_cache("TASK-1") == {'fields': {'summary': {}}}
+
+    def test_jira_issues_get_splits_expanded_editmeta_and_names(self, fake_mantis: MantisClient, requests_mock):
+        expanded = CacheData().ecs_1
+        expanded['editmeta'] = {'fields': {'summary': {}}}
+        expanded['names'] = {'summary': 'Summary', 'status': 'Status'}
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-1', json=expanded)
+
+        issue = fake_mantis.jira.issues.get("ECS-1")
+        assert requests_mock.last_request.qs['expand'] == ['editmeta,names']
+        assert 'editmeta' not in issue.data and 'names' not in issue.data
+        assert fake_mantis.cache.get_issue("ECS-1") == issue.data
+        assert issue.editmeta_data == {'fields': {'summary': {}}}
+        assert fake_mantis.cache.get_field_names() == {'summary': 'Summary', 'status': 'Status'}
+        assert requests_mock.call_count == 1
+
+        fake_mantis.cache.update_field_names({'description': 'Description'})
+        assert fake_mantis.cache.get_field_names() == {'summary': 'Summary', 'status': 'Status', 'description': 'Description'}
+
+    def test_jira_issue_field_names_falls_back_to_names_request(self, fake_mantis: MantisClient, requests_mock):
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-2', json=CacheData().get_names)
+        fake_mantis.cache.write_issue("ECS-2", CacheData().ecs_2)
+        issue = fake_mantis.jira.issues.get("ECS-2")
+
+        assert issue.field_names['customfield_10035'] == 'Design'
+        assert issue.field_names.keys() <= issue.fields.keys()
+        assert requests_mock.call_count == 1
+        assert fake_mantis.cache.get_field_names()['aggregateprogress'] == 'Σ Progress'
+
+    def test_jira_issues_get_for_draft_fetches_projected_fields(self, fake_mantis: MantisClient, requests_mock):
+        draft_fields = ['project', 'parent', 'summary', 'status', 'issuetype', 'assignee', 'reporter', 'description']
+        projected = CacheData().ecs_1
+        projected['fields'] = {key: value for key, value in projected['fields'].items() if key in draft_fields}
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-1', json=projected)
+
+        issue = fake_mantis.jira.issues.get_for_draft("ECS-1")
+        assert requests_mock.last_request.qs['fields'] == [','.join(draft_fields).lower()]
+        assert issue.get_field('summary') == CacheData().ecs_1['fields']['summary']
+        assert not (fake_mantis.cache.issue_file("ECS-1")).exists()
+        assert fake_mantis.cache.get_projected_issue("ECS-1", ['summary']) == projected
+        assert fake_mantis.cache.get_projected_issue("ECS-1", ['summary', 'labels']) is None
+
+        fake_mantis.jira.issues.get_for_draft("ECS-1")
+        assert requests_mock.call_count == 1
+
+        requests_mock.get(f'{fake_mantis.http.api_url}/issue/ECS-1', json=CacheData().ecs_1)
+        fake_mantis.jira.issues.get("ECS-1")
+        assert 'fields' not in requests_mock.last_request.qs
+        assert not (fake_mantis.cache.issue_file("ECS-1", projected=True)).exists()
+        fake_mantis.jira.issues.get_for_draft("ECS-1")
+        assert requests_mock.call_count == 2
+
+    def test_jira_issues_draft_fields_are_configurable(self, fake_mantis: MantisClient):
+        assert 'header' not in fake_mantis.jira.issues.draft_fields
+        assert 'description' in fake_mantis.jira.issues.draft_fields
+        fake_mantis.options.options['cache'] = {'draft-fields': ['summary', 'labels']}
+        # The fields drafts always read are added
+        assert fake_mantis.jira.issues.draft_fields == ['summary', 'labels', 'issuetype', 'description']
+
+    def test_jira_issues_sync_pages_through_search_and_writes_to_cache(self, fake_mantis: MantisClient, requests_mock):
+        search_url = f'{fake_mantis.http.api_url}/search'
+        requests_mock.get(search_url, [
+            {'json': {'startAt': 0, 'total': 3, 'issues': [CacheData().ecs_1, CacheData().ecs_2]}},
+            {'json': {'startAt': 2, 'total': 3, 'issues': [CacheData().ecs_3]}},
+        ])
+        requests_mock.get(f'{fake_mantis.http.api_url}/myself', json={'timeZone': 'Europe/Copenhagen'})
+        synced = fake_mantis.jira.issues.sync()
+        assert fake_mantis.cache.get_sync_watermark('project = TEST') is None
+        assert [data['key'] for data in synced] == ['ECS-1', 'ECS-2', 'ECS-3']
+        assert requests_mock.request_history[0].qs['jql'] == ['project = test order by updated asc']
+        assert requests_mock.request_history[1].qs['startat'] == ['2']
+        assert {file.name for file in fake_mantis.cache.iter_dir("issues")} == {"ECS-1.json", "ECS-2.json", "ECS-3.json"}
+        watermark = fake_mantis.cache.get_sync_watermark('project = TEST')
+        # ECS-1 was updated last, at 2025-05-19T00:45:14.992+0200
+        assert watermark == '2025/05/19 00:43'
+
+        requests_mock.get(search_url, json={'startAt': 0, 'total': 0, 'issues': []})
+        assert list(fake_mantis.jira.issues.sync()) == []
+        assert requests_mock.last_request.qs['jql'] == [f'(project = test) and updated >= "{watermark}" order by updated asc']
+        # Nothing was synced, so the watermark stays
+        assert fake_mantis.cache.get_sync_watermark('project = TEST') == watermark
+
+    def test_jira_issues_sync_watermark_is_in_profile_timezone(self, fake_mantis: MantisClient, requests_mock):
+        requests_mock.get(f'{fake_mantis.http.api_url}/search', json={'startAt': 0, 'total': 1, 'issues': [CacheData().ecs_1]})
+        requests_mock.get(f'{fake_mantis.http.api_url}/myself', json={'timeZone': 'America/New_York'})
+        assert len(list(fake_mantis.jira.issues.sync())) == 1
+        # 2025-05-19T00:45+0200 is 18:45 the day before in New York, less the overlap
+        assert fake_mantis.cache.get_sync_watermark('project = TEST') == '2025/05/18 18:43'
+
+    def test_jira_issues_sync_applies_watermark_to_every_clause(self, fake_mantis: MantisClient, requests_mock):
+        jql = 'project = A OR project = B'
+        fake_mantis.cache.write_sync_watermark(jql, '2024/01/02 03:04')
+        requests_mock.get(f'{fake_mantis.http.api_url}/search', json={'startAt': 0, 'total': 0, 'issues': []})
+        assert list(fake_mantis.jira.issues.sync(jql)) == []
+        assert requests_mock.last_request.qs['jql'] == [
+            '(project = a or project = b) and updated >= "2024/01/02 03:04" order by updated asc'
+        ]
+
+    def test_jira_issues_sync_rejects_order_by(self, fake_mantis: MantisClient, requests_mock):
+        with pytest.raises(ValueError):
+            list(fake_mantis.jira.issues.sync('project = A ORDER BY created DESC'))
+        assert not requests_mock.called
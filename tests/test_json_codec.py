@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+from mantis import json_codec
+from mantis.json_codec import CODECS
+from tests.data import CacheData
+
+
+class TestJsonCodec:
+    @pytest.mark.parametrize("name", list(CODECS))
+    def test_codec_roundtrips_fixtures(self, name: str):
+        codec = CODECS[name]
+        issue = CacheData().ecs_1
+        encoded = codec.dumps(issue)
+        assert isinstance(encoded, bytes)
+        assert codec.loads(encoded) == issue
+        assert codec.loads(encoded.decode()) == issue
+        # Readable by the stdlib, whichever codec wrote it
+        assert json.loads(encoded) == issue
+
+    @pytest.mark.parametrize("name", list(CODECS))
+    def test_codec_accepts_int_keys(self, name: str):
+        assert json.loads(CODECS[name].dumps({1: 'a'})) == {'1': 'a'}
+
+    def test_module_functions_use_the_fastest_codec(self):
+        assert json_codec.codec is CODECS.get("orjson", CODECS["json"])
+        assert json_codec.loads(json_codec.dumps({'key': 'ECS-1'})) == {'key': 'ECS-1'}
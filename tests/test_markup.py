@@ -0,0 +1,83 @@
+import pytest
+
+from drafts.markup import iter_jira_to_markdown, jira_to_markdown, markdown_to_jira
+
+JIRA = '''\
+h1. Checkout
+Pay with *bold*, _italic_, -struck-, +inserted+ and {{mono_text}} at [the shop|https://example.com/a_b].
+* First
+** Nested *item*
+*# Numbered
+# One
+# Two
+bq. A quote
+
+||Name||Value||
+|a|*b*|
+{code:python}
+total = price * amount  # _not_ italic
+{code}
+----
+Dates like 2024-01-02 and snake_case_names stay as they are.'''
+
+MARKDOWN = '''\
+# Checkout
+Pay with **bold**, *italic*, ~~struck~~, <ins>inserted</ins> and `mono_text` at [the shop](https://example.com/a_b).
+- First
+  - Nested **item**
+  1. Numbered
+1. One
+1. Two
+> A quote
+
+| Name | Value |
+| --- | --- |
+| a | **b** |
+```python
+total = price * amount  # _not_ italic
+```
+***
+Dates like 2024-01-02 and snake_case_names stay as they are.'''
+
+
+class TestMarkup:
+    def test_jira_to_markdown(self):
+        assert jira_to_markdown(JIRA) == MARKDOWN
+
+    def test_markdown_to_jira(self):
+        # Quotes come back as {quote} blocks, which may span several lines
+        assert markdown_to_jira(MARKDOWN) == JIRA.replace('bq. A quote', '{quote}\nA quote\n{quote}')
+
+    @pytest.mark.parametrize("jira, markdown", [
+        ('{noformat}raw *text*{noformat}', '```\nraw *text*\n```'),
+        ('{code:title=Example.java|language=java}\nint x;\n{code}', '```java\nint x;\n```'),
+        ('{quote}\nfirst\nsecond\n{quote}\nafter', '> first\n> second\n\nafter'),
+        ('|a|b|', '|  |  |\n| a | b |\n| --- | --- |'),
+        ('[https://example.com/x_y] and [~jdoe]', '<https://example.com/x_y> and [~jdoe]'),
+        ('!screen.png|thumbnail!', '![](screen.png)'),
+        ('*_both_*', '***both***'),
+        ('-- and - stay', '-- and - stay'),
+    ])
+    def test_jira_to_markdown_blocks(self, jira: str, markdown: str):
+        assert jira_to_markdown(jira) == markdown
+
+    @pytest.mark.parametrize("markdown, jira", [
+        ('~~~\ncode\n~~~', '{code}\ncode\n{code}'),
+        ('> quoted **text**\n> more', '{quote}\nquoted *text*\nmore\n{quote}'),
+        ('- a\n    - b\n        1) c\n- d', '* a\n** b\n**# c\n* d'),
+        ('__bold__ and _italic_', '*bold* and _italic_'),
+        ('`a *b*` and ![alt](img.png)', '{{a *b*}} and !img.png!'),
+        ('[https://e.com](https://e.com) <https://f.com>', '[https://e.com] [https://f.com]'),
+        ('| a | b |\n|---|:-:|\n| 1 | 2 |', '||a||b||\n|1|2|'),
+        ('2*3*4 and \\*not italic\\*', '2*3*4 and \\*not italic\\*'),
+    ])
+    def test_markdown_to_jira_blocks(self, markdown: str, jira: str):
+        assert markdown_to_jira(markdown) == jira
+
+    def test_unterminated_blocks_are_closed(self):
+        assert jira_to_markdown('{code}\nx') == '```\nx\n```'
+        assert markdown_to_jira('```\nx') == '{code}\nx\n{code}'
+
+    def test_streams_lines(self):
+        lines = iter(['h2. Title\r\n', '* item\r\n'])
+        assert list(iter_jira_to_markdown(lines)) == ['## Title', '- item']
@@ -33,3 +33,37 @@ class TestOpenAIClient:
         ]
         result = fake_mantis.open_ai_client.get_completion("input", "prompt")
         assert result == "Hello world!"
+
+    def test_get_completion_is_cached(self, fake_mantis: MantisClient):
+        client = fake_mantis.open_ai_client
+        client.disabled = False
+        client.open_ai = MagicMock()
+        client.open_ai.chat.completions.create.return_value.choices = [
+            type("obj", (), {"message": type("msg", (), {"content": "Hello world!"})()})
+        ]
+        assert client.get_completion("input", "prompt") == "Hello world!"
+        # Another client, e.g. a later run, reads it from the cache dir
+        fake_mantis.open_ai_client = type(client)(fake_mantis)
+        fake_mantis.open_ai_client.disabled = False
+        fake_mantis.open_ai_client.open_ai = client.open_ai
+        assert fake_mantis.open_ai_client.get_completion("input", "prompt") == "Hello world!"
+        assert client.open_ai.chat.completions.create.call_count == 1
+        # A different model, prompt or input is a different completion
+        client.get_completion("input", "prompt", model="gpt-4.1-mini")
+        client.get_completion("input", "other prompt")
+        client.get_completion("other input", "prompt")
+        assert client.open_ai.chat.completions.create.call_count == 4
+        assert client.open_ai.chat.completions.create.call_args_list[1].kwargs["model"] == "gpt-4.1-mini"
+
+    def test_get_completion_cache_can_be_disabled(self, fake_mantis: MantisClient):
+        fake_mantis.options.options["openai"] = {"completion-cache-mb": 0}
+        client = fake_mantis.open_ai_client
+        client.disabled = False
+        client.open_ai = MagicMock()
+        client.open_ai.chat.completions.create.return_value.choices = [
+            type("obj", (), {"message": type("msg", (), {"content": "Hello world!"})()})
+        ]
+        client.get_completion("input", "prompt")
+        client.get_completion("input", "prompt")
+        assert client.open_ai.chat.completions.create.call_count == 2
+        assert not list(fake_mantis.cache.iter_dir("completions"))
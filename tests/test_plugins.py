@@ -0,0 +1,49 @@
+import importlib
+import sys
+
+import pytest
+
+
+def _plugin_modules() -> dict:
+    return {name: module for name, module in sys.modules.items() if name == 'plugins' or name.startswith('plugins.')}
+
+
+@pytest.fixture
+def plugins():
+    """A freshly imported plugins package, with none of its modules loaded yet.
+
+    The modules imported before the test are restored afterwards.
+    """
+    saved = _plugin_modules()
+    for name in saved:
+        del sys.modules[name]
+    yield importlib.import_module('plugins')
+    for name in _plugin_modules():
+        del sys.modules[name]
+    sys.modules.update(saved)
+
+
+class TestPlugins:
+    def test_import_only_indexes_filenames(self, plugins):
+        assert 'plugins_test' in plugins.Plugins.all_plugins
+        assert 'epic_createmeta' in plugins.Plugins.all_plugins
+        assert not [_ for _ in sys.modules if _.startswith('plugins.')]
+
+    def test_plugins_are_imported_on_first_access(self, plugins):
+        assert plugins.Plugins.plugins_test.Schema(type='a', system='b').system == 'b'
+        assert plugins.plugins_test is plugins.Plugins.all_plugins['plugins_test']
+        assert [_ for _ in sys.modules if _.startswith('plugins.')] == ['plugins.plugins_test']
+
+    def test_unknown_plugin(self, plugins):
+        with pytest.raises(AttributeError):
+            _ = plugins.Plugins.does_not_exist
+        with pytest.raises(AttributeError):
+            _ = plugins.does_not_exist
+
+    def test_stats_reports_every_plugin(self, plugins, capsys):
+        _ = plugins.Plugins.plugins_test
+        plugins.Plugins.stats()
+        output = capsys.readouterr().out
+        assert '- plugins_test (4)' in output
+        assert '- epic_createmeta (not loaded)' in output
+        assert len(output.splitlines()) == len(plugins.Plugins.all_plugins) + 1